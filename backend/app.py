@@ -3,6 +3,8 @@ ToolHub - FastAPI Backend
 A unified platform for various file conversion and utility tools
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, HTMLResponse
@@ -19,16 +21,34 @@ from backend.tools.scan2pdf.routes import router as scan2pdf_router
 from backend.tools.documark.routes import router as documark_router
 from backend.tools.datavalidator.routes import router as datavalidator_router
 from backend.tools.colorpalette.routes import router as colorpalette_router
+from backend.services.scan2pdf_service import shutdown_executors
+from backend.services.scan2pdf_jobs import job_manager
+from backend.services.scan2pdf_watcher import start_watcher, stop_watcher
+from backend.services.documark_service import start_renderer, shutdown_renderer
+from backend.utils.image_converter import shutdown_ocr_engines
 
 # Setup logging
 logger = setup_logger()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    start_renderer()
+    start_watcher()
+    yield
+    await stop_watcher()
+    await job_manager.shutdown()
+    shutdown_executors()
+    shutdown_ocr_engines()
+    shutdown_renderer()
+
 # Create FastAPI app
 app = FastAPI(
     title="ToolHub",
     version=API_VERSION,
     description="A unified platform for file conversion and utility tools",
-    debug=DEBUG
+    debug=DEBUG,
+    lifespan=lifespan
 )
 
 logger.info(f"Starting ToolHub v{API_VERSION}")
@@ -4,6 +4,7 @@ Loads configuration from appconfig.json with fallback defaults
 """
 
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any
 
@@ -58,6 +59,54 @@ def get_default_config() -> Dict[str, Any]:
             "tesseract_required": True,
             "weasyprint_enabled": True
         },
+        "scan2pdf": {
+            "execution_mode": "sequential",
+            "workers": 0,
+            "page_workers": 4,
+            "max_inflight_pages": 8,
+            "ocr_language": "eng",
+            "ocr_dpi": 300,
+            "ocr_config": "",
+            "cache_enabled": True,
+            "cache_dir": "ocr_cache",
+            "cache_max_size_mb": 2048,
+            "cache_use_hardlinks": True,
+            "pdf_ocr_mode": "full",
+            "ocr_engine": "auto",
+            "job_retention_minutes": 1440,
+            "threads": 0,
+            "incremental": True,
+            "manifest_dir": "scan2pdf_manifests",
+            "max_concurrent": 0,
+            "max_queue_depth": 32,
+            "retry_after_seconds": 30,
+            "interactive_max_files": 5,
+            "search_index_enabled": True,
+            "search_index_path": "scan2pdf_search.sqlite3",
+            "image_only": False,
+            "optimize_output": False,
+            "optimize_dpi": 200,
+            "optimize_jpeg_quality": 75,
+            "optimize_detect_color": True,
+            "ocr_preprocess": "off",
+            "progress_mode": "events",
+            "progress_batch_ms": 500,
+            "progress_heartbeat_seconds": 15,
+            "thumbnail_dir": "scan2pdf_thumbnails",
+            "thumbnail_dpi": 48,
+            "thumbnail_cache_max_size_mb": 256,
+            "watch_enabled": False,
+            "watch_folders": [],
+            "watch_poll_seconds": 5,
+            "watch_settle_seconds": 10,
+            "watch_concurrency": 2
+        },
+        "documark": {
+            "render_workers": 0,
+            "render_max_queue": 16,
+            "render_timeout_seconds": 60,
+            "retry_after_seconds": 5
+        },
         "cors": {
             "allowed_origins": ["*"],
             "allowed_methods": ["*"],
@@ -105,6 +154,56 @@ OCR_ENABLED = _config["features"]["ocr_enabled"]
 TESSERACT_REQUIRED = _config["features"]["tesseract_required"]
 WEASYPRINT_ENABLED = _config["features"]["weasyprint_enabled"]
 
+# Scan2PDF settings
+_scan2pdf = {**get_default_config()["scan2pdf"], **_config.get("scan2pdf", {})}
+SCAN2PDF_EXECUTION_MODE = _scan2pdf["execution_mode"]
+SCAN2PDF_WORKERS = _scan2pdf["workers"] or os.cpu_count() or 1
+SCAN2PDF_PAGE_WORKERS = _scan2pdf["page_workers"] or os.cpu_count() or 1
+SCAN2PDF_MAX_INFLIGHT_PAGES = _scan2pdf["max_inflight_pages"]
+SCAN2PDF_OCR_LANGUAGE = _scan2pdf["ocr_language"]
+SCAN2PDF_OCR_DPI = _scan2pdf["ocr_dpi"]
+SCAN2PDF_OCR_CONFIG = _scan2pdf["ocr_config"]
+SCAN2PDF_CACHE_ENABLED = _scan2pdf["cache_enabled"]
+SCAN2PDF_CACHE_DIR = BASE_DIR / _scan2pdf["cache_dir"]
+SCAN2PDF_CACHE_MAX_SIZE = _scan2pdf["cache_max_size_mb"] * 1024 * 1024
+SCAN2PDF_CACHE_USE_HARDLINKS = _scan2pdf["cache_use_hardlinks"]
+SCAN2PDF_PDF_OCR_MODE = _scan2pdf["pdf_ocr_mode"]
+SCAN2PDF_OCR_ENGINE = _scan2pdf["ocr_engine"]
+SCAN2PDF_JOB_RETENTION_MINUTES = _scan2pdf["job_retention_minutes"]
+SCAN2PDF_THREADS = _scan2pdf["threads"] or min(32, (os.cpu_count() or 1) + 4)
+SCAN2PDF_INCREMENTAL = _scan2pdf["incremental"]
+SCAN2PDF_MANIFEST_DIR = BASE_DIR / _scan2pdf["manifest_dir"]
+SCAN2PDF_MAX_CONCURRENT = _scan2pdf["max_concurrent"] or SCAN2PDF_WORKERS
+SCAN2PDF_MAX_QUEUE_DEPTH = _scan2pdf["max_queue_depth"]
+SCAN2PDF_RETRY_AFTER_SECONDS = _scan2pdf["retry_after_seconds"]
+SCAN2PDF_INTERACTIVE_MAX_FILES = _scan2pdf["interactive_max_files"]
+SCAN2PDF_SEARCH_INDEX_ENABLED = _scan2pdf["search_index_enabled"]
+SCAN2PDF_SEARCH_INDEX_PATH = BASE_DIR / _scan2pdf["search_index_path"]
+SCAN2PDF_IMAGE_ONLY = _scan2pdf["image_only"]
+SCAN2PDF_OPTIMIZE_OUTPUT = _scan2pdf["optimize_output"]
+SCAN2PDF_OPTIMIZE_DPI = _scan2pdf["optimize_dpi"]
+SCAN2PDF_OPTIMIZE_JPEG_QUALITY = _scan2pdf["optimize_jpeg_quality"]
+SCAN2PDF_OPTIMIZE_DETECT_COLOR = _scan2pdf["optimize_detect_color"]
+SCAN2PDF_OCR_PREPROCESS = _scan2pdf["ocr_preprocess"]
+SCAN2PDF_PROGRESS_MODE = _scan2pdf["progress_mode"]
+SCAN2PDF_PROGRESS_BATCH_MS = _scan2pdf["progress_batch_ms"]
+SCAN2PDF_PROGRESS_HEARTBEAT_SECONDS = _scan2pdf["progress_heartbeat_seconds"]
+SCAN2PDF_THUMBNAIL_DIR = BASE_DIR / _scan2pdf["thumbnail_dir"]
+SCAN2PDF_THUMBNAIL_DPI = _scan2pdf["thumbnail_dpi"]
+SCAN2PDF_THUMBNAIL_CACHE_MAX_SIZE = _scan2pdf["thumbnail_cache_max_size_mb"] * 1024 * 1024
+SCAN2PDF_WATCH_ENABLED = _scan2pdf["watch_enabled"]
+SCAN2PDF_WATCH_FOLDERS = _scan2pdf["watch_folders"]
+SCAN2PDF_WATCH_POLL_SECONDS = _scan2pdf["watch_poll_seconds"]
+SCAN2PDF_WATCH_SETTLE_SECONDS = _scan2pdf["watch_settle_seconds"]
+SCAN2PDF_WATCH_CONCURRENCY = _scan2pdf["watch_concurrency"]
+
+# DocuMark settings
+_documark = {**get_default_config()["documark"], **_config.get("documark", {})}
+DOCUMARK_RENDER_WORKERS = _documark["render_workers"] or min(4, os.cpu_count() or 1)
+DOCUMARK_RENDER_MAX_QUEUE = _documark["render_max_queue"]
+DOCUMARK_RENDER_TIMEOUT_SECONDS = _documark["render_timeout_seconds"]
+DOCUMARK_RETRY_AFTER_SECONDS = _documark["retry_after_seconds"]
+
 # CORS
 CORS_ORIGINS = _config["cors"]["allowed_origins"]
 CORS_METHODS = _config["cors"]["allowed_methods"]
@@ -0,0 +1,376 @@
+"""
+DocuMark Service
+Markdown to PDF rendering on dedicated WeasyPrint worker processes
+"""
+
+import asyncio
+import os
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, Set, Tuple
+
+import markdown
+
+from backend.config import (
+    WEASYPRINT_ENABLED, DOCUMARK_RENDER_WORKERS, DOCUMARK_RENDER_MAX_QUEUE,
+    DOCUMARK_RENDER_TIMEOUT_SECONDS, DOCUMARK_RETRY_AFTER_SECONDS
+)
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Try to import WeasyPrint (requires GTK+ on Windows)
+try:
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+    WEASYPRINT_ERROR = None
+except (ImportError, OSError) as e:
+    WEASYPRINT_AVAILABLE = False
+    WEASYPRINT_ERROR = str(e)
+
+MD_EXTENSIONS = ['codehilite', 'tables', 'fenced_code', 'toc', 'nl2br']
+
+
+class RendererBusy(Exception):
+    """Raised when the render queue is full"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within the render timeout"""
+
+
+def get_default_css():
+    """Get default CSS styling for PDF"""
+    return """
+        @page {
+            size: A4;
+            margin: 2cm;
+        }
+
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            line-height: 1.6;
+            color: #333;
+        }
+
+        h1, h2, h3, h4, h5, h6 {
+            color: #2c3e50;
+            margin-top: 1.5em;
+            margin-bottom: 0.5em;
+        }
+
+        h1 { font-size: 2em; border-bottom: 2px solid #3498db; padding-bottom: 0.3em; }
+        h2 { font-size: 1.5em; border-bottom: 1px solid #e0e0e0; padding-bottom: 0.3em; }
+        h3 { font-size: 1.25em; }
+
+        code {
+            background-color: #f4f4f4;
+            padding: 0.2em 0.4em;
+            border-radius: 3px;
+            font-family: 'Courier New', monospace;
+            font-size: 0.9em;
+        }
+
+        pre {
+            background-color: #f4f4f4;
+            padding: 1em;
+            border-radius: 5px;
+            overflow-x: auto;
+            border-left: 4px solid #3498db;
+        }
+
+        pre code {
+            background-color: transparent;
+            padding: 0;
+        }
+
+        table {
+            border-collapse: collapse;
+            width: 100%;
+            margin: 1em 0;
+        }
+
+        table th, table td {
+            border: 1px solid #ddd;
+            padding: 0.75em;
+            text-align: left;
+        }
+
+        table th {
+            background-color: #3498db;
+            color: white;
+            font-weight: 600;
+        }
+
+        table tr:nth-child(even) {
+            background-color: #f9f9f9;
+        }
+
+        blockquote {
+            border-left: 4px solid #3498db;
+            margin: 1em 0;
+            padding-left: 1em;
+            color: #666;
+            font-style: italic;
+        }
+
+        a {
+            color: #3498db;
+            text-decoration: none;
+        }
+
+        a:hover {
+            text-decoration: underline;
+        }
+
+        img {
+            max-width: 100%;
+            height: auto;
+        }
+
+        ul, ol {
+            margin: 1em 0;
+            padding-left: 2em;
+        }
+
+        li {
+            margin: 0.5em 0;
+        }
+    """
+
+
+def build_html(md_content: str, style: Optional[str] = None) -> str:
+    """Wrap rendered markdown in an HTML document with the given or default CSS"""
+    html_content = markdown.markdown(md_content, extensions=MD_EXTENSIONS)
+    return f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                {style or get_default_css()}
+            </style>
+        </head>
+        <body>
+            {html_content}
+        </body>
+        </html>
+        """
+
+
+def markdown_to_pdf(md_content: str, output_path: str, style: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """Convert markdown content to PDF (runs in a render worker process)"""
+    if not WEASYPRINT_AVAILABLE:
+        error_msg = WEASYPRINT_ERROR or 'Please install GTK+ libraries for Windows.'
+        return False, f"WeasyPrint is not available. {error_msg}"
+
+    try:
+        font_config = FontConfiguration()
+        HTML(string=build_html(md_content, style)).write_pdf(
+            output_path,
+            font_config=font_config
+        )
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+
+def warm_renderer():
+    """
+    Render a small document once per worker process
+
+    The first WeasyPrint render in a process pays for loading Pango and
+    scanning system fonts; doing it here keeps that off the first request.
+    """
+    if not WEASYPRINT_AVAILABLE:
+        return
+    try:
+        HTML(string=build_html("# ToolHub\n\n`warm-up`")).write_pdf(font_config=FontConfiguration())
+    except Exception as e:
+        logger.warning(f"Failed to warm WeasyPrint renderer: {str(e)}")
+
+
+class RenderLane:
+    """
+    A render worker process of its own
+
+    Each lane is a single-process executor, so a render that overruns can
+    be stopped by killing its process without breaking any other render.
+    """
+
+    def __init__(self):
+        self.executor = ProcessPoolExecutor(max_workers=1, initializer=warm_renderer)
+        self.pid: Optional[int] = None
+
+    async def ready(self):
+        """Start the worker process and wait until it has warmed up"""
+        self.pid = await asyncio.wrap_future(self.executor.submit(os.getpid))
+
+    def kill(self):
+        """Stop the worker, interrupting any render it is running"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.pid is not None:
+            try:
+                os.kill(self.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+
+class DocuMarkRenderer:
+    """
+    Runs WeasyPrint renders on dedicated worker processes
+
+    Renders are CPU-bound and hold the GIL, so they run in `workers`
+    processes (RenderLane) rather than on the event loop or a thread. A
+    render waits for an idle lane, and at most `max_queue` renders may wait;
+    beyond that render() raises RendererBusy. The timeout only counts from
+    when a lane picks the render up. A render that overruns cannot be
+    interrupted inside WeasyPrint, so its lane is killed and replaced; the
+    other lanes carry on.
+    """
+
+    def __init__(
+        self,
+        workers: int = DOCUMARK_RENDER_WORKERS,
+        max_queue: int = DOCUMARK_RENDER_MAX_QUEUE,
+        timeout: float = DOCUMARK_RENDER_TIMEOUT_SECONDS
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.retry_after = DOCUMARK_RETRY_AFTER_SECONDS
+        self._lanes: Set[RenderLane] = set()
+        self._idle: Optional[asyncio.Queue] = None
+        self.pending = 0
+        self.active = 0
+        self.rendered = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def start(self):
+        """Start and warm every lane (call from the event loop)"""
+        if self._idle is not None:
+            return
+        logger.info(f"Starting DocuMark render pool with {self.workers} worker(s)")
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers):
+            self._add_lane()
+
+    def _add_lane(self):
+        lane = RenderLane()
+        self._lanes.add(lane)
+        asyncio.get_running_loop().create_task(self._bring_up(lane))
+
+    async def _bring_up(self, lane: RenderLane):
+        """Make a lane available once its process is up, so no request waits on the warm-up"""
+        try:
+            await lane.ready()
+        except Exception as e:
+            # A lane that failed to start breaks on first use and is replaced then
+            logger.error(f"Failed to start DocuMark render worker: {str(e)}")
+        if lane in self._lanes:
+            self._idle.put_nowait(lane)
+
+    def _replace(self, lane: RenderLane):
+        """Kill a lane and start a fresh one in its place"""
+        self._lanes.discard(lane)
+        lane.kill()
+        self._add_lane()
+
+    def _release(self, lane: RenderLane, future: Optional[Future]):
+        """Hand a lane back, waiting for a render the caller gave up on to finish first"""
+        if future is None or future.done():
+            self._idle.put_nowait(lane)
+            return
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._idle.put_nowait, lane))
+
+    def overloaded(self) -> bool:
+        return self.pending >= self.workers + self.max_queue
+
+    async def render(self, md_content: str, output_path: str, style: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Render markdown to a PDF file on a render worker
+
+        Raises:
+            RendererBusy: If the render queue is full
+            RenderTimeout: If the render ran longer than the timeout
+        """
+        if not WEASYPRINT_AVAILABLE:
+            return markdown_to_pdf(md_content, output_path, style)
+        if self.overloaded():
+            raise RendererBusy()
+
+        self.start()
+        self.pending += 1
+        try:
+            # A lane whose process died while idle fails straight away; retry once on its replacement
+            for attempt in range(2):
+                lane = await self._idle.get()
+                future: Optional[Future] = None
+                self.active += 1
+                try:
+                    future = lane.executor.submit(markdown_to_pdf, md_content, output_path, style)
+                    success, error = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    logger.warning(f"DocuMark render exceeded {self.timeout} seconds, restarting its worker")
+                    self._replace(lane)
+                    lane = None
+                    raise RenderTimeout()
+                except BrokenProcessPool:
+                    self._replace(lane)
+                    lane = None
+                    if attempt:
+                        self.failed += 1
+                        return False, "Render worker exited unexpectedly"
+                    continue
+                finally:
+                    self.active -= 1
+                    if lane is not None:
+                        self._release(lane, future)
+                if success:
+                    self.rendered += 1
+                else:
+                    self.failed += 1
+                return success, error
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get renderer counters for the status endpoint"""
+        return {
+            'workers': self.workers,
+            'active': self.active,
+            'queued': self.pending - self.active,
+            'max_queue': self.max_queue,
+            'timeout_seconds': self.timeout,
+            'rendered': self.rendered,
+            'failed': self.failed,
+            'timed_out': self.timed_out
+        }
+
+    def shutdown(self):
+        """Shut down the render workers if they were started"""
+        if self._idle is not None:
+            logger.info("Shutting down DocuMark render pool")
+            for lane in self._lanes:
+                lane.executor.shutdown(wait=False, cancel_futures=True)
+            self._lanes = set()
+            self._idle = None
+
+
+renderer = DocuMarkRenderer()
+
+
+def start_renderer():
+    """Start and warm the render pool if WeasyPrint is available and enabled"""
+    if WEASYPRINT_AVAILABLE and WEASYPRINT_ENABLED:
+        renderer.start()
+
+
+def shutdown_renderer():
+    """Shut down the render pool on application shutdown"""
+    renderer.shutdown()
@@ -0,0 +1,174 @@
+"""
+OCR Scheduler
+Server-wide admission control for Scan2PDF conversions
+"""
+
+import asyncio
+import itertools
+from typing import Optional, List, Dict, Any, AsyncIterator
+
+from backend.config import (
+    SCAN2PDF_MAX_CONCURRENT, SCAN2PDF_MAX_QUEUE_DEPTH, SCAN2PDF_RETRY_AFTER_SECONDS
+)
+from backend.utils.cancellation import CancelToken
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Lower rank is served first
+PRIORITIES = {'interactive': 0, 'bulk': 1}
+
+
+class _Waiter:
+    """A pending slot request"""
+
+    def __init__(self, priority: str, seq: int):
+        self.priority = priority
+        self.rank = PRIORITIES[priority]
+        self.seq = seq
+        self.granted = False
+        self.changed = asyncio.Event()
+
+    def sort_key(self):
+        return self.rank, self.seq
+
+
+class OCRScheduler:
+    """
+    Bounded pool of OCR slots shared by every conversion in the server
+
+    Each file holds one slot while it converts, plus one for every further
+    page it OCRs in parallel (see try_acquire_extra). When no slot is free
+    the file queues, interactive requests ahead of bulk ones and FIFO within
+    a lane. Once max_queue_depth files are waiting, new work is refused so
+    the route can answer 503 instead of queueing without bound.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue_depth: int, retry_after: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue_depth = max_queue_depth
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._waiters)
+
+    def overloaded(self) -> bool:
+        """Check whether new conversions should be turned away"""
+        return bool(self.max_queue_depth) and len(self._waiters) >= self.max_queue_depth
+
+    def try_acquire(self, priority: str = 'bulk') -> bool:
+        """Take a slot without waiting, unless one is free but owed to a queued file"""
+        rank = PRIORITIES[priority]
+        if self.active < self.max_concurrent and not any(w.rank <= rank for w in self._waiters):
+            self.active += 1
+            return True
+        return False
+
+    def try_acquire_extra(self, priority: str = 'bulk', count: int = 0) -> int:
+        """
+        Take up to count more slots for a file that already holds one, without waiting
+
+        Returns:
+            Number of slots taken, each to be given back with release()
+        """
+        taken = 0
+        while taken < count and self.try_acquire(priority):
+            taken += 1
+        return taken
+
+    async def acquire(
+        self,
+        priority: str = 'bulk',
+        cancel_token: Optional[CancelToken] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Wait for a slot, yielding a `queued` event whenever the queue position changes
+
+        The slot belongs to the caller once the iterator is exhausted and must
+        be given back with release(). If the iterator is closed early, the
+        queue entry (or a slot granted in the meantime) is released.
+
+        Raises:
+            ConversionCancelled: If cancel_token is cancelled while queued
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        if self.try_acquire(priority):
+            return
+
+        waiter = _Waiter(priority, next(self._seq))
+        self._waiters.append(waiter)
+        self._waiters.sort(key=_Waiter.sort_key)
+        self._notify()
+        completed = False
+        try:
+            position = None
+            while not waiter.granted:
+                current = self._waiters.index(waiter) + 1
+                if current != position:
+                    position = current
+                    yield {'type': 'queued', 'position': position, 'queue_length': len(self._waiters),
+                           'priority': priority}
+                if waiter.granted:
+                    break
+                waiter.changed.clear()
+                await self._wait(waiter, cancel_token)
+            completed = True
+        finally:
+            if not completed:
+                if waiter.granted:
+                    self.release()
+                else:
+                    self._waiters.remove(waiter)
+                    self._notify()
+
+    @staticmethod
+    async def _wait(waiter: _Waiter, cancel_token: Optional[CancelToken]):
+        """Wait for a queue change, or for the conversion to be cancelled"""
+        if cancel_token is None:
+            await waiter.changed.wait()
+            return
+        changed = asyncio.ensure_future(waiter.changed.wait())
+        cancelled = asyncio.ensure_future(cancel_token.wait())
+        try:
+            await asyncio.wait({changed, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            changed.cancel()
+            cancelled.cancel()
+        if not waiter.granted:
+            cancel_token.raise_if_cancelled()
+
+    def release(self):
+        """Return a slot, handing it straight to the next queued file if any"""
+        if self._waiters:
+            waiter = self._waiters.pop(0)
+            waiter.granted = True
+            waiter.changed.set()
+            self._notify()
+        else:
+            self.active = max(0, self.active - 1)
+
+    def _notify(self):
+        """Wake queued files so they can report their new position"""
+        for waiter in self._waiters:
+            waiter.changed.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler counters for the status endpoint"""
+        lanes = {name: 0 for name in PRIORITIES}
+        for waiter in self._waiters:
+            lanes[waiter.priority] += 1
+        return {
+            'active': self.active,
+            'max_concurrent': self.max_concurrent,
+            'queued': len(self._waiters),
+            'queued_by_priority': lanes,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+ocr_scheduler = OCRScheduler(SCAN2PDF_MAX_CONCURRENT, SCAN2PDF_MAX_QUEUE_DEPTH, SCAN2PDF_RETRY_AFTER_SECONDS)
@@ -0,0 +1,175 @@
+"""
+Scan2PDF Job Manager
+Runs conversions detached from the HTTP request and keeps their event log
+so clients can re-attach and replay missed progress
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+
+from backend.config import SCAN2PDF_JOB_RETENTION_MINUTES
+from backend.services.scan2pdf_service import Scan2PDFService
+from backend.utils.cancellation import CancelToken
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConversionJob:
+    """A Scan2PDF batch and its ordered event log"""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.progress = {'current': 0, 'total': 0, 'percent': 0}
+        self.summary: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_token = CancelToken()
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def append(self, event: Dict[str, Any]):
+        """Record an event and wake up attached streams"""
+        self.events.append(event)
+        event_type = event.get('type')
+        if event_type in ('progress', 'file_complete'):
+            self.progress = {
+                'current': event.get('current', 0),
+                'total': event.get('total', 0),
+                'percent': event.get('percent', 0)
+            }
+        elif event_type == 'complete':
+            self.summary = {k: event[k] for k in ('successful', 'failed', 'skipped', 'cancelled', 'total')}
+        elif event_type == 'error':
+            self.error = event.get('error')
+        self._notify()
+
+    def finish(self, status: str):
+        self.status = status
+        self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self):
+        await self._changed.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status for the API"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': self.progress,
+            'summary': self.summary,
+            'error': self.error,
+            'last_event_id': len(self.events)
+        }
+
+
+class Scan2PDFJobManager:
+    """
+    Runs Scan2PDF conversions as background tasks
+
+    Event ids are 1-based positions in the job's event log, so a client that
+    reconnects with Last-Event-ID: N receives every event after the Nth.
+    """
+
+    def __init__(self, service: Scan2PDFService):
+        self.service = service
+        self.jobs: Dict[str, ConversionJob] = {}
+
+    def submit(self, params: Dict[str, Any]) -> ConversionJob:
+        """Start a conversion job and return immediately"""
+        self.prune()
+        job = ConversionJob(params)
+        self.jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        logger.info(f"Submitted Scan2PDF job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[ConversionJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job: ConversionJob) -> bool:
+        """
+        Ask a running job to stop
+
+        The job keeps streaming until its running files reach a page
+        boundary, then completes with the partial results and status
+        'cancelled'.
+
+        Returns:
+            False if the job had already finished
+        """
+        if job.finished:
+            return False
+        logger.info(f"Cancelling Scan2PDF job {job.id}")
+        job.cancel_token.cancel()
+        return True
+
+    async def _run(self, job: ConversionJob):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            async for event in self.service.convert(**job.params, cancel_token=job.cancel_token):
+                job.append(event)
+            if job.cancel_token.cancelled:
+                job.finish('cancelled')
+            else:
+                job.finish('failed' if job.summary is None else 'completed')
+        except asyncio.CancelledError:
+            job.append({'type': 'error', 'error': 'Job cancelled'})
+            job.finish('cancelled')
+            raise
+        except Exception as e:
+            logger.error(f"Scan2PDF job {job.id} failed: {str(e)}", exc_info=True)
+            job.append({'type': 'error', 'error': str(e)})
+            job.finish('failed')
+        finally:
+            job.cancel_token.close()
+        logger.info(f"Scan2PDF job {job.id} {job.status}")
+
+    async def stream(self, job: ConversionJob, last_event_id: int = 0) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (event_id, event) pairs after last_event_id, following the job until it finishes"""
+        position = max(0, last_event_id)
+        while True:
+            while position < len(job.events):
+                position += 1
+                yield position, job.events[position - 1]
+            if job.finished:
+                return
+            await job.wait_for_change()
+
+    def prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - SCAN2PDF_JOB_RETENTION_MINUTES * 60
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def shutdown(self):
+        """Cancel running jobs on application shutdown"""
+        tasks = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_manager = Scan2PDFJobManager(Scan2PDFService())
@@ -0,0 +1,143 @@
+"""
+Scan2PDF Progress Batching
+Coalesces conversion events into time-windowed SSE batches and keeps the
+per-file results of large batches for paginated retrieval
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+
+from backend.config import (
+    SCAN2PDF_JOB_RETENTION_MINUTES, SCAN2PDF_PROGRESS_BATCH_MS, SCAN2PDF_PROGRESS_HEARTBEAT_SECONDS
+)
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Event types where only the latest one in a batch matters
+SUPERSEDED_TYPES = {'progress', 'file_start', 'page_progress', 'queued', 'combining'}
+
+# Event types that are sent straight away instead of waiting for the window
+URGENT_TYPES = {'error', 'complete'}
+
+
+class ResultStore:
+    """
+    In-memory per-file results of finished conversions
+
+    Entries are kept for the job retention window, like finished jobs.
+    """
+
+    def __init__(self, retention_minutes: int):
+        self.retention_minutes = retention_minutes
+        self._results: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+    def put(self, files: List[Dict[str, Any]], result_id: Optional[str] = None) -> str:
+        """Store a file list, replacing any under the same id, and return its id"""
+        self.prune()
+        result_id = result_id or uuid.uuid4().hex
+        self._results[result_id] = (time.time(), files)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._results.get(result_id)
+        return entry[1] if entry else None
+
+    def prune(self):
+        """Forget results older than the retention window"""
+        cutoff = time.time() - self.retention_minutes * 60
+        expired = [result_id for result_id, (stored_at, _) in self._results.items() if stored_at < cutoff]
+        for result_id in expired:
+            del self._results[result_id]
+
+
+result_store = ResultStore(SCAN2PDF_JOB_RETENTION_MINUTES)
+
+
+def summarize_complete(event: Dict[str, Any], result_id: Optional[str] = None) -> Dict[str, Any]:
+    """Replace the files list of a `complete` event with a reference to the stored results"""
+    files = event.get('files', [])
+    summary = {key: value for key, value in event.items() if key != 'files'}
+    summary['result_id'] = result_store.put(files, result_id)
+    summary['files_total'] = len(files)
+    return summary
+
+
+def add_to_batch(batch: List[Dict[str, Any]], event: Dict[str, Any]):
+    """Append an event, dropping an earlier one it supersedes"""
+    if event.get('type') in SUPERSEDED_TYPES:
+        for i, queued in enumerate(batch):
+            if queued.get('type') == event['type']:
+                del batch[i]
+                break
+    batch.append(event)
+
+
+async def batch_events(
+    events: AsyncIterator[Tuple[Optional[int], Dict[str, Any]]],
+    window: float = SCAN2PDF_PROGRESS_BATCH_MS / 1000,
+    heartbeat: float = SCAN2PDF_PROGRESS_HEARTBEAT_SECONDS,
+    result_id: Optional[str] = None
+) -> AsyncIterator[Tuple[Optional[int], Dict[str, Any]]]:
+    """
+    Coalesce (event_id, event) pairs into `batch` events
+
+    Events are collected for up to `window` seconds after the first one
+    arrives, keeping only the latest of each progress-style type, and sent
+    as one `batch` carrying the id of its last event. Errors and the final
+    `complete` go out at once; `complete` loses its files list in favour of
+    a result_id for /results. A `heartbeat` is sent when nothing else has
+    been for `heartbeat` seconds, so proxies keep the stream open.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    batch: List[Dict[str, Any]] = []
+    batch_id: Optional[int] = None
+    flush_at = 0.0
+    last_sent = loop.time()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            deadline = flush_at if batch else last_sent + heartbeat
+            done, _ = await asyncio.wait({pending}, timeout=max(0.0, deadline - loop.time()))
+
+            if not done:
+                if batch:
+                    yield batch_id, {'type': 'batch', 'events': batch}
+                    batch = []
+                else:
+                    yield None, {'type': 'heartbeat', 'time': time.time()}
+                last_sent = loop.time()
+                continue
+
+            try:
+                event_id, event = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            if event.get('type') in URGENT_TYPES:
+                if batch:
+                    yield batch_id, {'type': 'batch', 'events': batch}
+                    batch = []
+                if event.get('type') == 'complete':
+                    event = summarize_complete(event, result_id)
+                yield event_id, event
+                last_sent = loop.time()
+                continue
+
+            if not batch:
+                flush_at = loop.time() + window
+            add_to_batch(batch, event)
+            batch_id = event_id
+
+        if batch:
+            yield batch_id, {'type': 'batch', 'events': batch}
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,834 @@
+"""
+Scan2PDF Service Layer
+Batch conversion pipeline for image/PDF to searchable PDF
+"""
+
+import asyncio
+import functools
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple, Set
+
+from backend.config import (
+    SCAN2PDF_EXECUTION_MODE, SCAN2PDF_WORKERS, SCAN2PDF_THREADS, SCAN2PDF_PDF_OCR_MODE,
+    SCAN2PDF_INCREMENTAL, SCAN2PDF_INTERACTIVE_MAX_FILES, SCAN2PDF_IMAGE_ONLY, SCAN2PDF_OPTIMIZE_OUTPUT,
+    SCAN2PDF_PAGE_WORKERS
+)
+from backend.services.ocr_scheduler import ocr_scheduler
+from backend.utils.cancellation import CancelToken, ConversionCancelled, CANCELLED_MESSAGE
+from backend.utils.image_converter import (
+    create_searchable_pdf, create_searchable_pdf_from_bytes, get_ocr_params,
+    tesseract_available, warm_ocr_engines
+)
+from backend.utils.ocr_cache import get_ocr_cache
+from backend.utils.pdf_merge import merge_pdfs
+from backend.utils.pdf_optimizer import PIKEPDF_AVAILABLE
+from backend.utils.search_index import get_search_index
+from backend.utils.scan_manifest import ScanManifest, iter_directory
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif', '.gif', '.pdf'}
+# Inputs that may have several pages (or frames) to OCR in parallel
+MULTI_PAGE_EXTENSIONS = {'.pdf', '.tiff', '.tif', '.gif'}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+# Cancel tokens of running batch conversions by conversion id
+active_conversions: Dict[str, CancelToken] = {}
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared OCR process pool, creating it on first use"""
+    global _process_pool
+    if _process_pool is None:
+        logger.info(f"Starting Scan2PDF process pool with {SCAN2PDF_WORKERS} worker(s)")
+        _process_pool = ProcessPoolExecutor(max_workers=SCAN2PDF_WORKERS, initializer=warm_ocr_engines)
+    return _process_pool
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Get the Scan2PDF thread pool, creating it on first use
+
+    All blocking Scan2PDF work (OCR, hashing, directory scans, combining)
+    runs here so the event loop keeps serving other requests, and a large
+    batch cannot starve the loop's default executor.
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=SCAN2PDF_THREADS, thread_name_prefix='scan2pdf')
+    return _thread_pool
+
+
+def shutdown_executors():
+    """Shut down the shared Scan2PDF executors if they were started"""
+    global _process_pool, _thread_pool
+    if _process_pool is not None:
+        logger.info("Shutting down Scan2PDF process pool")
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the Scan2PDF thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+def run_conversion(
+    file_path: Path,
+    pdf_path: Path,
+    options: Dict[str, Any],
+    progress_callback=None
+) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Convert one file and collect converter stats
+
+    Module-level so it can be submitted to the process pool.
+    """
+    stats: Dict[str, Any] = {}
+    success, message = create_searchable_pdf(file_path, pdf_path, progress_callback=progress_callback,
+                                             stats=stats, **options)
+    add_io_stats(stats, file_path, pdf_path, classify_result(success, message))
+    return success, message, stats
+
+
+def add_io_stats(stats: Dict[str, Any], file_path: Path, pdf_path: Path, file_status: str):
+    """Round stage timings and record bytes read and written for a converted file"""
+    if 'timings' in stats:
+        stats['timings'] = {stage: round(seconds, 4) for stage, seconds in stats['timings'].items()}
+    if file_status != 'success':
+        return
+    try:
+        stats['bytes_in'] = file_path.stat().st_size
+        stats['bytes_out'] = pdf_path.stat().st_size
+    except OSError:
+        pass
+
+
+def summarize_stats(files: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Total per-stage timings and bytes across a batch for the `complete` event"""
+    timings: Dict[str, float] = {}
+    bytes_in = bytes_out = 0
+    optimize: Dict[str, int] = {}
+    for f in files:
+        stats = f.get('stats') or {}
+        for stage, seconds in stats.get('timings', {}).items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        bytes_in += stats.get('bytes_in', 0)
+        bytes_out += stats.get('bytes_out', 0)
+        for key, value in stats.get('optimize', {}).items():
+            optimize[key] = optimize.get(key, 0) + value
+    summary = {
+        'timings': {stage: round(seconds, 4) for stage, seconds in timings.items()},
+        'bytes_in': bytes_in,
+        'bytes_out': bytes_out,
+        'elapsed': round(elapsed, 4),
+        'bytes_per_second': int(bytes_in / elapsed) if elapsed > 0 else 0
+    }
+    if optimize:
+        summary['optimize'] = optimize
+    return summary
+
+
+def resolve_optimize(optimize: Optional[bool]) -> bool:
+    """Decide whether to optimize outputs, warning if pikepdf is missing"""
+    if SCAN2PDF_OPTIMIZE_OUTPUT if optimize is None else optimize:
+        if PIKEPDF_AVAILABLE:
+            return True
+        logger.warning("Output optimization requested but pikepdf is not installed")
+    return False
+
+
+def wanted_page_workers(file_path: Path, image_only: bool = False) -> int:
+    """Number of OCR slots a file can use, one per page OCR'd in parallel"""
+    suffix = file_path.suffix.lower()
+    if suffix in MULTI_PAGE_EXTENSIONS and not (image_only and suffix != '.pdf'):
+        return max(1, SCAN2PDF_PAGE_WORKERS)
+    return 1
+
+
+def get_output_name(file_path: Path) -> str:
+    """Get the output PDF name for an input file"""
+    if file_path.suffix.lower() == '.pdf':
+        return file_path.stem + '_ocr.pdf'
+    return file_path.stem + '.pdf'
+
+
+def classify_result(success: bool, message: str) -> str:
+    """Map a converter (success, message) result to a file status"""
+    if not success:
+        return 'cancelled' if message == CANCELLED_MESSAGE else 'failed'
+    if "already exists" in message.lower() or "skipped" in message.lower():
+        return 'skipped'
+    return 'success'
+
+
+class Scan2PDFService:
+    """Service for batch image/PDF to searchable PDF conversion"""
+
+    @staticmethod
+    def collect_input_files(input_files: List[str], input_path: str, recursive: bool = False) -> List[Path]:
+        """
+        Resolve the list of files to convert
+
+        Raises:
+            ValueError: If neither input is given or the input path does not exist
+        """
+        if input_files:
+            return [Path(f) for f in input_files if Path(f).suffix.lower() in SUPPORTED_EXTENSIONS]
+
+        if not input_path:
+            raise ValueError('Input files or path is required')
+
+        input_path_obj = Path(input_path)
+        if input_path_obj.is_file():
+            if input_path_obj.suffix.lower() in SUPPORTED_EXTENSIONS:
+                return [input_path_obj]
+            return []
+        if input_path_obj.is_dir():
+            return sorted([Path(entry.path) for entry in
+                           iter_directory(input_path_obj, SUPPORTED_EXTENSIONS, recursive)], reverse=True)
+        raise ValueError('Input path does not exist')
+
+    @staticmethod
+    def collect_changed_files(
+        input_dir: Path,
+        output_dir: Path,
+        recursive: bool = False
+    ) -> Tuple[ScanManifest, List[Path], List[Path], Set[Path]]:
+        """
+        Scan an input folder against its manifest
+
+        Returns:
+            (manifest, files to convert, existing outputs of unchanged files,
+            files to convert that the manifest already has a row for)
+        """
+        manifest = ScanManifest.for_folders(input_dir, output_dir)
+        entries = list(iter_directory(input_dir, SUPPORTED_EXTENSIONS, recursive))
+        changed, unchanged = manifest.partition(entries, recursive=recursive)
+        return manifest, sorted(changed, reverse=True), unchanged, manifest.recorded(changed)
+
+    @staticmethod
+    def get_output_paths(input_files_list: List[Path], input_dir: Optional[Path], output_dir: Path) -> List[Path]:
+        """
+        Map input files to output PDFs, creating output subfolders as needed
+
+        Files found below input_dir keep their relative subfolder in output_dir.
+        """
+        pdf_paths = []
+        for file_path in input_files_list:
+            subfolder = Path()
+            if input_dir is not None and file_path.parent != input_dir:
+                subfolder = file_path.parent.relative_to(input_dir)
+            pdf_paths.append(output_dir / subfolder / get_output_name(file_path))
+        for parent in {pdf_path.parent for pdf_path in pdf_paths}:
+            parent.mkdir(parents=True, exist_ok=True)
+        return pdf_paths
+
+    async def convert(
+        self,
+        input_files: List[str],
+        input_path: str,
+        output_path: str,
+        skip_existing: bool = True,
+        combine_pdfs: bool = False,
+        execution_mode: Optional[str] = None,
+        pdf_ocr_mode: Optional[str] = None,
+        combine_order: Optional[List[str]] = None,
+        recursive: bool = False,
+        incremental: Optional[bool] = None,
+        priority: Optional[str] = None,
+        image_only: Optional[bool] = None,
+        optimize: Optional[bool] = None,
+        cancel_token: Optional[CancelToken] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Convert a batch of files, yielding progress events
+
+        Events are plain dicts; the route layer is responsible for
+        serializing them onto the SSE stream.
+
+        When input_path is a folder, recursive also converts its subfolders
+        and incremental (default from config) consults the folder manifest,
+        so only new or changed files are converted. skip_existing applies to
+        files the manifest has no row for; a recorded file that changed is
+        always converted again.
+
+        Every file waits for a slot from the server-wide OCR scheduler.
+        priority ('interactive' or 'bulk') picks the queue lane; by default
+        batches of up to SCAN2PDF_INTERACTIVE_MAX_FILES files are interactive.
+
+        image_only (default from config) skips OCR for images and embeds them
+        losslessly, so a batch of photos converts at disk speed. optimize
+        (default from config) shrinks the page images of OCR'd outputs.
+
+        The first `progress` event carries a conversion_id for cancel().
+        Cancelling (through cancel(), cancel_token or by closing this
+        iterator, as happens when the client disconnects) stops queued files
+        from starting. Running files stop at once when the tesseract CLI does
+        the OCR (its process is killed), or after the current page with
+        tesserocr. Files that did not finish are reported with status
+        'cancelled', the rest keep their results, and no combined PDF is
+        built.
+        """
+        if not output_path:
+            yield {'type': 'error', 'error': 'Output path is required'}
+            return
+
+        started = time.perf_counter()
+        output_dir = Path(output_path)
+        input_dir = None
+        if not input_files and input_path and await run_blocking(Path(input_path).is_dir):
+            input_dir = Path(input_path)
+        if incremental is None:
+            incremental = SCAN2PDF_INCREMENTAL
+
+        manifest: Optional[ScanManifest] = None
+        unchanged_pdf_paths: List[Path] = []
+        reconvert: Set[Path] = set()
+        try:
+            if input_dir is not None and incremental:
+                manifest, input_files_list, unchanged_pdf_paths, reconvert = await run_blocking(
+                    self.collect_changed_files, input_dir, output_dir, recursive)
+            else:
+                input_files_list = await run_blocking(self.collect_input_files, input_files, input_path,
+                                                      recursive)
+        except ValueError as e:
+            yield {'type': 'error', 'error': str(e)}
+            return
+
+        if not input_files_list and not unchanged_pdf_paths:
+            yield {'type': 'error', 'error': 'No supported files found'}
+            return
+
+        await run_blocking(output_dir.mkdir, parents=True, exist_ok=True)
+        pdf_paths = await run_blocking(self.get_output_paths, input_files_list, input_dir, output_dir)
+
+        mode = execution_mode or SCAN2PDF_EXECUTION_MODE
+        cancel_token = cancel_token or CancelToken()
+        options = {
+            'skip_if_exists': skip_existing,
+            'ocr_mode': pdf_ocr_mode or SCAN2PDF_PDF_OCR_MODE,
+            'cancel_token': cancel_token
+        }
+        if SCAN2PDF_IMAGE_ONLY if image_only is None else image_only:
+            options['image_only'] = True
+        if resolve_optimize(optimize):
+            options['optimize'] = True
+        total_files = len(input_files_list)
+        results: List[Optional[Dict[str, Any]]] = [None] * total_files
+        lane = priority or ('interactive' if total_files <= SCAN2PDF_INTERACTIVE_MAX_FILES else 'bulk')
+        conversion_id = uuid.uuid4().hex
+        logger.info(f"Converting {total_files} file(s) in {mode} mode ({lane} priority), "
+                    f"conversion {conversion_id}")
+
+        active_conversions[conversion_id] = cancel_token
+        events: Optional[AsyncIterator[Dict[str, Any]]] = None
+        try:
+            progress = {'type': 'progress', 'current': 0, 'total': total_files, 'percent': 0,
+                        'conversion_id': conversion_id}
+            if manifest is not None:
+                progress['unchanged'] = len(unchanged_pdf_paths)
+            yield progress
+
+            if mode == 'process' and total_files > 1:
+                events = self._convert_parallel(input_files_list, pdf_paths, options, results, lane, reconvert)
+            else:
+                events = self._convert_sequential(input_files_list, pdf_paths, options, results, lane,
+                                                  reconvert)
+            async for event in events:
+                if event['type'] == 'file_complete':
+                    result = results[event['index'] - 1]
+                    # Recording skipped files seeds the manifest from outputs that already existed
+                    if manifest is not None and result['file']['status'] in ('success', 'failed', 'skipped'):
+                        await run_blocking(manifest.record, result['input_path'], result['pdf_path'],
+                                           result['file']['status'])
+                    if result['file']['status'] == 'success':
+                        await run_blocking(self.index_output, result['pdf_path'], result['input_path'])
+                yield event
+
+            # Files that never started once the batch was cancelled
+            for idx, (file_path, pdf_path) in enumerate(zip(input_files_list, pdf_paths)):
+                if results[idx] is None:
+                    self._record_result(idx, idx + 1, file_path, pdf_path, False, CANCELLED_MESSAGE, {},
+                                        results)
+
+            # Results are indexed by input position, so downstream steps see input order
+            # no matter which worker finished first
+            files = [r['file'] for r in results]
+            successful = sum(1 for f in files if f['status'] == 'success')
+            failed = sum(1 for f in files if f['status'] == 'failed')
+            skipped = sum(1 for f in files if f['status'] == 'skipped')
+            cancelled = sum(1 for f in files if f['status'] == 'cancelled')
+            successful_pdf_paths = await run_blocking(self.collect_output_paths, results, unchanged_pdf_paths)
+
+            if combine_pdfs and successful_pdf_paths and not cancel_token.cancelled:
+                try:
+                    successful_pdf_paths = self.order_for_combine(successful_pdf_paths, results, combine_order)
+                    combined_path = output_dir / 'combined.pdf'
+                    total_pdfs = len(successful_pdf_paths)
+
+                    yield {'type': 'combining', 'message': f'Combining {total_pdfs} PDFs...',
+                           'current': 0, 'total': total_pdfs, 'percent': 0}
+
+                    def on_document(done: int, total: int, pdf_path: Path) -> Dict[str, Any]:
+                        return {'type': 'combining', 'file': pdf_path.name, 'current': done, 'total': total,
+                                'percent': int((done / total) * 100)}
+
+                    combine_started = time.perf_counter()
+                    result: List[Any] = []
+                    async for event in self._run_with_progress(
+                        functools.partial(merge_pdfs, successful_pdf_paths, combined_path), on_document, result
+                    ):
+                        yield event
+                    page_count = result[0]
+                    combine_stats = {'timings': {'combine': round(time.perf_counter() - combine_started, 4)}}
+
+                    files.append({
+                        'name': 'combined.pdf',
+                        'status': 'success',
+                        'message': f'Combined {total_pdfs} PDFs ({page_count} pages)',
+                        'stats': combine_stats
+                    })
+
+                    yield {'type': 'combined', 'file': 'combined.pdf', 'output_path': str(combined_path),
+                           'count': total_pdfs, 'pages': page_count, 'stats': combine_stats}
+                except Exception as e:
+                    logger.error(f"Failed to combine PDFs: {str(e)}", exc_info=True)
+                    yield {'type': 'error', 'error': f'Failed to combine PDFs: {str(e)}'}
+
+            complete = {'type': 'complete', 'successful': successful, 'failed': failed, 'skipped': skipped,
+                        'cancelled': cancelled, 'total': total_files, 'files': files,
+                        'stats': summarize_stats(files, time.perf_counter() - started)}
+            if manifest is not None:
+                complete['unchanged'] = len(unchanged_pdf_paths)
+            yield complete
+        except (GeneratorExit, asyncio.CancelledError):
+            logger.info(f"Conversion {conversion_id} abandoned by its consumer, cancelling")
+            cancel_token.cancel()
+            raise
+        finally:
+            del active_conversions[conversion_id]
+            if events is not None:
+                # Run the conversion's own cleanup now rather than when it is garbage collected
+                await events.aclose()
+            cancel_token.close()
+
+    @staticmethod
+    def cancel(conversion_id: str) -> bool:
+        """
+        Cancel a running batch conversion
+
+        Returns:
+            False if no conversion with that id is running
+        """
+        cancel_token = active_conversions.get(conversion_id)
+        if cancel_token is None:
+            return False
+        logger.info(f"Cancelling conversion {conversion_id}")
+        cancel_token.cancel()
+        return True
+
+    async def convert_upload(
+        self,
+        data: bytes,
+        filename: str,
+        pdf_ocr_mode: Optional[str] = None,
+        image_only: Optional[bool] = None,
+        optimize: Optional[bool] = None
+    ) -> Tuple[bool, str, Optional[bytes], Dict[str, Any]]:
+        """
+        Convert an uploaded file held in memory
+
+        Direct mode for drag-and-drop: the upload is decoded once from its
+        buffer and the PDF is returned as bytes, skipping UPLOAD_FOLDER and
+        the output directory entirely.
+
+        Returns:
+            (success, message, pdf_bytes, stats)
+        """
+        stats: Dict[str, Any] = {}
+        image_only = SCAN2PDF_IMAGE_ONLY if image_only is None else image_only
+        async for _ in ocr_scheduler.acquire('interactive'):
+            pass
+        slots = 1 + ocr_scheduler.try_acquire_extra(
+            'interactive', wanted_page_workers(Path(filename), image_only) - 1)
+        try:
+            success, message, pdf_bytes = await run_blocking(
+                create_searchable_pdf_from_bytes, data, filename, page_workers=slots,
+                ocr_mode=pdf_ocr_mode or SCAN2PDF_PDF_OCR_MODE, stats=stats,
+                image_only=image_only, optimize=resolve_optimize(optimize)
+            )
+        finally:
+            for _ in range(slots):
+                ocr_scheduler.release()
+        return success, message, pdf_bytes, stats
+
+    @staticmethod
+    def collect_output_paths(
+        results: List[Dict[str, Any]],
+        unchanged_pdf_paths: Optional[List[Path]] = None
+    ) -> List[Path]:
+        """
+        Get the PDFs a batch produced, including existing outputs it skipped
+
+        Outputs of files the manifest found unchanged are included if they
+        still exist.
+        """
+        return [r['pdf_path'] for r in results
+                if r['file']['status'] == 'success'
+                or (r['file']['status'] == 'skipped' and r['pdf_path'].exists())] + \
+            [p for p in unchanged_pdf_paths or [] if p.exists()]
+
+    @staticmethod
+    def index_output(pdf_path: Path, file_path: Path):
+        """Add a converted PDF's text to the search index"""
+        search_index = get_search_index()
+        if search_index is None:
+            return
+        try:
+            search_index.index_pdf(pdf_path, file_path)
+        except Exception as e:
+            logger.warning(f"Failed to index {pdf_path.name} for search: {str(e)}")
+
+    @staticmethod
+    def order_for_combine(
+        pdf_paths: List[Path],
+        results: List[Dict[str, Any]],
+        combine_order: Optional[List[str]] = None
+    ) -> List[Path]:
+        """
+        Order converted PDFs for the combined document
+
+        Names in combine_order may be input or output file names; those PDFs
+        come first in the given order, followed by any others in the default
+        reverse name order.
+        """
+        default_order = sorted(pdf_paths, reverse=True)
+        if not combine_order:
+            return default_order
+
+        available = set(pdf_paths)
+        by_name: Dict[str, Path] = {}
+        for r in results:
+            if r['pdf_path'] in available:
+                by_name.setdefault(r['input_name'], r['pdf_path'])
+                by_name.setdefault(r['pdf_path'].name, r['pdf_path'])
+
+        ordered: List[Path] = []
+        for name in combine_order:
+            pdf_path = by_name.get(name)
+            if pdf_path is not None and pdf_path not in ordered:
+                ordered.append(pdf_path)
+        ordered_set = set(ordered)
+        return ordered + [p for p in default_order if p not in ordered_set]
+
+    async def _convert_sequential(
+        self,
+        input_files_list: List[Path],
+        pdf_paths: List[Path],
+        options: Dict[str, Any],
+        results: List[Optional[Dict[str, Any]]],
+        priority: str = 'bulk',
+        reconvert: Optional[Set[Path]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Convert files one at a time in the current process, stopping once cancelled"""
+        total_files = len(input_files_list)
+        cancel_token: CancelToken = options['cancel_token']
+        for idx, (file_path, pdf_path) in enumerate(zip(input_files_list, pdf_paths)):
+            try:
+                async for event in ocr_scheduler.acquire(priority, cancel_token):
+                    yield {**event, 'file': file_path.name, 'index': idx + 1}
+            except ConversionCancelled:
+                return
+            # Pages OCR'd in parallel count against the OCR budget too; take what is free
+            slots = 1 + ocr_scheduler.try_acquire_extra(
+                priority, wanted_page_workers(file_path, options.get('image_only', False)) - 1)
+            try:
+                yield {'type': 'file_start', 'file': file_path.name, 'index': idx + 1, 'total': total_files}
+
+                result: List[Any] = []
+                file_options = {**self._file_options(options, file_path, reconvert), 'page_workers': slots}
+                async for event in self._convert_with_page_progress(idx, file_path, pdf_path, file_options,
+                                                                    result):
+                    yield event
+            finally:
+                for _ in range(slots):
+                    ocr_scheduler.release()
+            success, message, stats = result[0]
+            yield self._record_result(idx, idx + 1, file_path, pdf_path, success, message, stats, results)
+
+    @staticmethod
+    def _file_options(
+        options: Dict[str, Any],
+        file_path: Path,
+        reconvert: Optional[Set[Path]] = None
+    ) -> Dict[str, Any]:
+        """Get a file's conversion options; the existing output of a file in reconvert is stale"""
+        if reconvert and file_path in reconvert:
+            return {**options, 'skip_if_exists': False}
+        return options
+
+    def convert_file(
+        self,
+        file_path: Path,
+        pdf_path: Path,
+        options: Dict[str, Any],
+        progress_callback=None
+    ) -> Tuple[bool, str, Dict[str, Any]]:
+        """Convert one file in the current process, serving it from the OCR cache when possible"""
+        key, cached = self._cache_lookup(file_path, pdf_path, options)
+        if cached:
+            return cached
+        success, message, stats = run_conversion(file_path, pdf_path, options, progress_callback)
+        self._cache_store(key, pdf_path, success, message, stats)
+        return success, message, stats
+
+    @staticmethod
+    def _cache_lookup(
+        file_path: Path,
+        pdf_path: Path,
+        options: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[Tuple[bool, str, Dict[str, Any]]]]:
+        """
+        Look a file up in the OCR cache
+
+        Returns:
+            (cache key, result) - the result is set on a hit, the key is None
+            when the file should bypass the cache entirely
+        """
+        cache = get_ocr_cache()
+        if cache is None or not tesseract_available:
+            return None, None
+        # Image-only conversions embed images without OCR, so there is nothing to cache
+        if options.get('image_only') and file_path.suffix.lower() != '.pdf':
+            return None, None
+        # Let the converter report existing outputs as skipped
+        if options.get('skip_if_exists', True) and pdf_path.exists() and pdf_path.stat().st_size > 0:
+            return None, None
+        start = time.perf_counter()
+        try:
+            key = cache.make_key(file_path, get_ocr_params(options))
+        except OSError:
+            return None, None
+        if cache.get(key, pdf_path):
+            stats = {'cached': True, 'timings': {'cache': time.perf_counter() - start}}
+            add_io_stats(stats, file_path, pdf_path, 'success')
+            return key, (True, "Searchable PDF restored from OCR cache", stats)
+        cache.detach(pdf_path)
+        return key, None
+
+    @staticmethod
+    def _cache_store(key: Optional[str], pdf_path: Path, success: bool, message: str,
+                     stats: Optional[Dict[str, Any]] = None):
+        """
+        Add a freshly OCR'd PDF to the cache
+
+        Outputs with pages embedded without OCR are left out, so a later run
+        gets another chance at OCR'ing them.
+        """
+        cache = get_ocr_cache()
+        if cache is None or key is None:
+            return
+        if (classify_result(success, message) == 'success' and 'without ocr' not in message.lower()
+                and not (stats or {}).get('pages_fallback')):
+            cache.put(key, pdf_path)
+
+    async def _convert_with_page_progress(
+        self,
+        idx: int,
+        file_path: Path,
+        pdf_path: Path,
+        options: Dict[str, Any],
+        result: List[Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Convert one file in a worker thread, yielding `page_progress` events"""
+        def on_page(page: int, pages: int) -> Dict[str, Any]:
+            return {'type': 'page_progress', 'file': file_path.name, 'index': idx + 1,
+                    'page': page, 'pages': pages}
+
+        async for event in self._run_with_progress(
+            functools.partial(self.convert_file, file_path, pdf_path, options), on_page, result
+        ):
+            yield event
+
+    @staticmethod
+    async def _run_with_progress(
+        func,
+        make_event,
+        result: List[Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run func(progress_callback=...) on the thread pool, yielding its progress as events
+
+        The callback fires on the worker thread, so each make_event(*args)
+        result is handed back to the event loop through a queue. The return
+        value of func is appended to `result` once it finishes.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def progress_callback(*args):
+            loop.call_soon_threadsafe(queue.put_nowait, make_event(*args))
+
+        future = loop.run_in_executor(get_thread_pool(),
+                                      functools.partial(func, progress_callback=progress_callback))
+        while not (future.done() and queue.empty()):
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+        result.append(future.result())
+
+    async def _convert_parallel(
+        self,
+        input_files_list: List[Path],
+        pdf_paths: List[Path],
+        options: Dict[str, Any],
+        results: List[Optional[Dict[str, Any]]],
+        priority: str = 'bulk',
+        reconvert: Optional[Set[Path]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Convert files concurrently on the shared process pool
+
+        At most SCAN2PDF_WORKERS files are in flight, so `file_start` is only
+        emitted once a worker is about to pick the file up. Each worker OCRs
+        its pages serially since the pool already keeps every core busy.
+
+        Each file also needs an OCR scheduler slot. The batch only queues for
+        one when nothing of its own is running; otherwise it takes free slots
+        as they come and waits on its in-flight files.
+
+        Once cancelled, no further files are submitted, submitted files no
+        worker has picked up yet are withdrawn, and running workers see the
+        cancel marker, killing a running tesseract process.
+        """
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        worker_options = {**options, 'page_workers': 1}
+        cancel_token: CancelToken = options['cancel_token']
+        total_files = len(input_files_list)
+        in_flight: Dict[asyncio.Future, tuple] = {}
+        next_idx = 0
+        completed = 0
+        cancel_waiter = asyncio.ensure_future(cancel_token.wait())
+
+        try:
+            while (next_idx < total_files and not cancel_token.cancelled) or in_flight:
+                while (next_idx < total_files and len(in_flight) < SCAN2PDF_WORKERS
+                       and not cancel_token.cancelled):
+                    file_path = input_files_list[next_idx]
+                    pdf_path = pdf_paths[next_idx]
+                    if not in_flight:
+                        try:
+                            async for event in ocr_scheduler.acquire(priority, cancel_token):
+                                yield {**event, 'file': file_path.name, 'index': next_idx + 1}
+                        except ConversionCancelled:
+                            break
+                    elif not ocr_scheduler.try_acquire(priority):
+                        break
+                    worker_future = None
+                    try:
+                        # Cache lookups stay in this process so hit/miss counters are shared
+                        key, cached = await run_blocking(self._cache_lookup, file_path, pdf_path,
+                                                         self._file_options(options, file_path, reconvert))
+                        if cached:
+                            future = loop.create_future()
+                            future.set_result(cached)
+                        else:
+                            worker_future = pool.submit(run_conversion, file_path, pdf_path,
+                                                        self._file_options(worker_options, file_path, reconvert))
+                            cancel_token.track(worker_future)
+                            future = asyncio.wrap_future(worker_future)
+                    except BaseException:
+                        ocr_scheduler.release()
+                        raise
+                    in_flight[future] = (next_idx, file_path, pdf_path, key, worker_future)
+                    yield {'type': 'file_start', 'file': file_path.name, 'index': next_idx + 1,
+                           'total': total_files}
+                    next_idx += 1
+
+                if not in_flight:
+                    break
+                waiting = set(in_flight)
+                if not cancel_waiter.done():
+                    waiting.add(cancel_waiter)
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if cancel_waiter in done:
+                    # Only succeeds for files no worker has picked up yet
+                    for entry in in_flight.values():
+                        if entry[4] is not None:
+                            entry[4].cancel()
+                    done.discard(cancel_waiter)
+                for future in done:
+                    idx, file_path, pdf_path, key, _ = in_flight.pop(future)
+                    ocr_scheduler.release()
+                    try:
+                        success, message, stats = future.result()
+                    except asyncio.CancelledError:
+                        success, message, stats = False, CANCELLED_MESSAGE, {}
+                    except Exception as e:
+                        logger.error(f"Worker failed on {file_path.name}: {str(e)}", exc_info=True)
+                        success, message, stats = False, f"Worker error: {str(e)}", {}
+                    await run_blocking(self._cache_store, key, pdf_path, success, message, stats)
+                    completed += 1
+                    yield self._record_result(idx, completed, file_path, pdf_path, success, message, stats,
+                                              results)
+        finally:
+            cancel_waiter.cancel()
+            for future in in_flight:
+                future.cancel()
+                ocr_scheduler.release()
+
+    @staticmethod
+    def _record_result(
+        idx: int,
+        current: int,
+        file_path: Path,
+        pdf_path: Path,
+        success: bool,
+        message: str,
+        stats: Dict[str, Any],
+        results: List[Optional[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Store a file result and build its `file_complete` event"""
+        total_files = len(results)
+        file_status = classify_result(success, message)
+        results[idx] = {
+            'input_name': file_path.name,
+            'input_path': file_path,
+            'pdf_path': pdf_path,
+            'file': {
+                'name': pdf_path.name,
+                'status': file_status,
+                'message': message,
+                'stats': stats
+            }
+        }
+
+        output_file_path = str(pdf_path) if file_status in ['success', 'skipped'] else None
+        return {
+            'type': 'file_complete',
+            'file': file_path.name,
+            'index': idx + 1,
+            'output_file': pdf_path.name,
+            'output_path': output_file_path,
+            'status': file_status,
+            'message': message,
+            'stats': stats,
+            'current': current,
+            'total': total_files,
+            'percent': int((current / total_files) * 100)
+        }
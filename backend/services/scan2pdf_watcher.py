@@ -0,0 +1,233 @@
+"""
+Scan2PDF Watch Folders
+Long-running ingest that converts files as scanners drop them into configured folders
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from backend.config import (
+    SCAN2PDF_WATCH_ENABLED, SCAN2PDF_WATCH_FOLDERS, SCAN2PDF_WATCH_POLL_SECONDS,
+    SCAN2PDF_WATCH_SETTLE_SECONDS, SCAN2PDF_WATCH_CONCURRENCY
+)
+from backend.services.scan2pdf_service import Scan2PDFService, SUPPORTED_EXTENSIONS, run_blocking
+from backend.utils.scan_manifest import ScanManifest, iter_directory
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class WatchFolder:
+    """
+    One configured input folder and the output folder its PDFs go to
+
+    Files the manifest reports as new or changed are only handed on once
+    their size and mtime have held still for settle_seconds, so files a
+    scanner is still writing are left alone.
+    """
+
+    def __init__(self, input_dir: Path, output_dir: Path, recursive: bool = False):
+        """
+        Raises:
+            ValueError: If the output folder is the input folder itself
+        """
+        if output_dir.resolve() == input_dir.resolve():
+            raise ValueError(f"Watch folder output must differ from its input: {input_dir}")
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.recursive = recursive
+        self.manifest = ScanManifest.for_folders(input_dir, output_dir)
+        # PDFs written to an output folder inside the input must not be fed back in
+        self._output_prefix: Optional[str] = None
+        if output_dir.resolve().is_relative_to(input_dir.resolve()):
+            self._output_prefix = str(input_dir / output_dir.resolve().relative_to(input_dir.resolve())) + os.sep
+        # path -> (size, mtime_ns, monotonic time the file was first seen with them)
+        self._observed: Dict[Path, Tuple[int, int, float]] = {}
+
+    @classmethod
+    def from_config(cls, folder: Dict[str, Any]) -> 'WatchFolder':
+        """
+        Build a watch folder from an entry of scan2pdf.watch_folders
+
+        Raises:
+            ValueError: If the entry has no input or output folder, or they are the same
+        """
+        if not folder.get('input') or not folder.get('output'):
+            raise ValueError(f"Watch folder needs 'input' and 'output': {folder}")
+        return cls(Path(folder['input']), Path(folder['output']), bool(folder.get('recursive', False)))
+
+    def scan(self, settle_seconds: float, exclude) -> List[Path]:
+        """List new or changed files that have finished arriving, skipping those in exclude"""
+        if not self.input_dir.is_dir():
+            return []
+        entries = [entry for entry in iter_directory(self.input_dir, SUPPORTED_EXTENSIONS, self.recursive)
+                   if not (self._output_prefix and entry.path.startswith(self._output_prefix))]
+        # Files in exclude are still partitioned, or their manifest rows would be dropped as removed
+        changed, _ = self.manifest.partition(entries, retry_failed=False, recursive=self.recursive)
+
+        now = time.monotonic()
+        ready = []
+        observed = {}
+        for file_path in changed:
+            if file_path in exclude:
+                continue
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            size, mtime_ns, since = self._observed.get(file_path, (None, None, now))
+            if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                since = now
+            if stat.st_size > 0 and now - since >= settle_seconds:
+                ready.append(file_path)
+            else:
+                observed[file_path] = (stat.st_size, stat.st_mtime_ns, since)
+        # Forget files that were converted, deleted or moved meanwhile
+        self._observed = observed
+        return sorted(ready)
+
+    def output_dir_for(self, file_path: Path) -> Path:
+        """Output folder for a source, keeping its subfolder below the input folder"""
+        return self.output_dir / file_path.parent.relative_to(self.input_dir)
+
+
+class Scan2PDFWatcher:
+    """
+    Polls the watch folders and converts what arrives
+
+    Ready files go onto one queue shared by all folders and are converted by
+    `concurrency` workers, one file each at a time. Every file still takes a
+    bulk-lane slot from the OCR scheduler, so interactive conversions keep
+    priority. Outcomes are written to each folder's manifest, which is what
+    keeps converted files from being picked up again after a restart.
+    """
+
+    def __init__(
+        self,
+        service: Scan2PDFService,
+        folders: List[WatchFolder],
+        poll_seconds: float = SCAN2PDF_WATCH_POLL_SECONDS,
+        settle_seconds: float = SCAN2PDF_WATCH_SETTLE_SECONDS,
+        concurrency: int = SCAN2PDF_WATCH_CONCURRENCY
+    ):
+        self.service = service
+        self.folders = folders
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.concurrency = max(1, concurrency)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: set = set()
+        self._tasks: List[asyncio.Task] = []
+        self.active = 0
+        self.converted = 0
+        self.failed = 0
+        self.last_poll: Optional[float] = None
+
+    def start(self):
+        """Start polling and the conversion workers on the running loop"""
+        loop = asyncio.get_running_loop()
+        logger.info(f"Watching {len(self.folders)} folder(s) for Scan2PDF ingest, "
+                    f"{self.concurrency} worker(s)")
+        self._tasks = [loop.create_task(self._poll(folder)) for folder in self.folders]
+        self._tasks += [loop.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Stop watching; files being converted are cancelled and picked up again next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _poll(self, folder: WatchFolder):
+        while True:
+            try:
+                ready = await run_blocking(folder.scan, self.settle_seconds, frozenset(self._pending))
+                self.last_poll = time.time()
+            except Exception as e:
+                logger.error(f"Failed to scan watch folder {folder.input_dir}: {str(e)}", exc_info=True)
+                ready = []
+            for file_path in ready:
+                self._pending.add(file_path)
+                self._queue.put_nowait((folder, file_path))
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _work(self):
+        while True:
+            folder, file_path = await self._queue.get()
+            self.active += 1
+            try:
+                await self._convert(folder, file_path)
+            except Exception as e:
+                logger.error(f"Watch folder conversion of {file_path.name} failed: {str(e)}", exc_info=True)
+            finally:
+                self.active -= 1
+                self._pending.discard(file_path)
+
+    async def _convert(self, folder: WatchFolder, file_path: Path):
+        """Convert one arrived file and record the outcome in the folder manifest"""
+        output_dir = folder.output_dir_for(file_path)
+        async for event in self.service.convert([str(file_path)], '', str(output_dir),
+                                                skip_existing=False, execution_mode='sequential',
+                                                priority='bulk'):
+            if event['type'] == 'error':
+                logger.warning(f"Watch folder conversion of {file_path.name} failed: {event['error']}")
+            elif event['type'] == 'file_complete':
+                status = event['status']
+                if status == 'cancelled':
+                    continue
+                await run_blocking(folder.manifest.record, file_path, output_dir / event['output_file'],
+                                   status)
+                if status == 'failed':
+                    self.failed += 1
+                    logger.warning(f"Watch folder conversion of {file_path.name} failed: {event['message']}")
+                else:
+                    self.converted += 1
+                    logger.info(f"Watch folder converted {file_path.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get watcher counters for the status endpoint"""
+        return {
+            'folders': [str(folder.input_dir) for folder in self.folders],
+            'queued': self._queue.qsize(),
+            'active': self.active,
+            'converted': self.converted,
+            'failed': self.failed,
+            'last_poll': self.last_poll
+        }
+
+
+_watcher: Optional[Scan2PDFWatcher] = None
+
+
+def get_watcher() -> Optional[Scan2PDFWatcher]:
+    """Get the running watcher, or None if watch folders are disabled"""
+    return _watcher
+
+
+def start_watcher():
+    """Start watching the configured folders if watch mode is enabled"""
+    global _watcher
+    if not SCAN2PDF_WATCH_ENABLED or _watcher is not None:
+        return
+    folders = []
+    for folder in SCAN2PDF_WATCH_FOLDERS:
+        try:
+            folders.append(WatchFolder.from_config(folder))
+        except ValueError as e:
+            logger.error(str(e))
+    if not folders:
+        logger.warning("Watch mode is enabled but no watch folders are configured")
+        return
+    _watcher = Scan2PDFWatcher(Scan2PDFService(), folders)
+    _watcher.start()
+
+
+async def stop_watcher():
+    """Stop the watcher on application shutdown"""
+    global _watcher
+    if _watcher is not None:
+        await _watcher.stop()
+        _watcher = None
@@ -2,11 +2,10 @@
 ColorPalette - Generate color palettes from images
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from PIL import Image
-import io
 from typing import List, Optional
 from collections import Counter
 import colorsys
@@ -15,6 +14,7 @@ import math
 
 from backend.utils.responses import api_success_response, api_error_response
 from backend.utils.messages import MessageCode
+from backend.utils.uploads import receive_uploads, remove_uploads
 from backend.utils.logging import get_logger
 
 router = APIRouter()
@@ -40,20 +40,23 @@ class ContrastRequest(BaseModel):
 
 @router.post("/generate")
 async def generate_palette(
-    file: UploadFile = File(...),
+    request: Request,
     num_colors: int = 5,
     method: str = 'dominant'
 ):
-    """Generate color palette from uploaded image"""
+    """Generate color palette from uploaded image (multipart `file` field)"""
     logger.info(f"Generating palette with method: {method}, num_colors: {num_colors}")
+    uploads = []
     try:
+        uploads = await receive_uploads(request, 'file', max_files=1)
+        
         # Validate image
-        if not file.content_type or not file.content_type.startswith('image/'):
+        if not uploads[0].content_type.startswith('image/'):
             raise api_error_response(MessageCode.INVALID_FILE_TYPE, file_type='image')
         
         # Read image
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = Image.open(uploads[0].path)
+        image.load()
         
         # Convert to RGB if needed
         if image.mode != 'RGB':
@@ -85,17 +88,22 @@ async def generate_palette(
     except Exception as e:
         logger.error(f"Error generating palette: {str(e)}", exc_info=True)
         raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+    finally:
+        remove_uploads(uploads)
 
 @router.post("/analyze")
-async def analyze_image(file: UploadFile = File(...)):
-    """Analyze image and return color information"""
+async def analyze_image(request: Request):
+    """Analyze image and return color information (multipart `file` field)"""
     logger.info("Analyzing image")
+    uploads = []
     try:
-        if not file.content_type or not file.content_type.startswith('image/'):
+        uploads = await receive_uploads(request, 'file', max_files=1)
+        
+        if not uploads[0].content_type.startswith('image/'):
             raise api_error_response(MessageCode.INVALID_FILE_TYPE, file_type='image')
         
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = Image.open(uploads[0].path)
+        image.load()
         
         if image.mode != 'RGB':
             image = image.convert('RGB')
@@ -135,6 +143,8 @@ async def analyze_image(file: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"Error analyzing image: {str(e)}", exc_info=True)
         raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+    finally:
+        remove_uploads(uploads)
 
 def extract_dominant_colors(image: Image.Image, num_colors: int) -> List[dict]:
     """Extract dominant colors from image"""
@@ -3,26 +3,22 @@ DocuMark - FastAPI Routes
 Markdown to PDF Converter
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from pathlib import Path
-import markdown
+from starlette.background import BackgroundTask
+import os
 import tempfile
 
+from backend.services.documark_service import (
+    renderer, RendererBusy, RenderTimeout, WEASYPRINT_AVAILABLE, WEASYPRINT_ERROR
+)
 from backend.utils.responses import api_success_response, api_error_response
 from backend.utils.messages import MessageCode
+from backend.utils.uploads import receive_uploads, remove_uploads
 from backend.utils.logging import get_logger
 
-# Try to import WeasyPrint (requires GTK+ on Windows)
-try:
-    from weasyprint import HTML
-    from weasyprint.text.fonts import FontConfiguration
-    WEASYPRINT_AVAILABLE = True
-except (ImportError, OSError) as e:
-    WEASYPRINT_AVAILABLE = False
-    WEASYPRINT_ERROR = str(e)
-
 router = APIRouter()
 logger = get_logger(__name__)
 
@@ -34,7 +30,8 @@ async def status():
         MessageCode.SUCCESS,
         data={
             'weasyprint_available': WEASYPRINT_AVAILABLE,
-            'error': WEASYPRINT_ERROR if not WEASYPRINT_AVAILABLE else None
+            'error': WEASYPRINT_ERROR if not WEASYPRINT_AVAILABLE else None,
+            'renderer': renderer.stats()
         }
     )
 
@@ -46,192 +43,84 @@ ALLOWED_EXTENSIONS = {'.md', '.markdown', '.txt'}
 def allowed_file(filename):
     return Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
 
-def markdown_to_pdf(md_content, output_path, style=None):
-    """Convert markdown content to PDF"""
-    if not WEASYPRINT_AVAILABLE:
-        error_msg = WEASYPRINT_ERROR if 'WEASYPRINT_ERROR' in globals() else 'Please install GTK+ libraries for Windows.'
-        return False, f"WeasyPrint is not available. {error_msg}"
-    
+def remove_output(output_path):
+    """Remove a rendered PDF, ignoring files that are already gone"""
     try:
-        md_extensions = [
-            'codehilite',
-            'tables',
-            'fenced_code',
-            'toc',
-            'nl2br'
-        ]
-        
-        html_content = markdown.markdown(
-            md_content,
-            extensions=md_extensions
-        )
-        
-        html_template = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                {style or get_default_css()}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        font_config = FontConfiguration()
-        HTML(string=html_template).write_pdf(
-            output_path,
-            font_config=font_config
-        )
-        
-        return True, None
-    except Exception as e:
-        return False, str(e)
+        os.unlink(output_path)
+    except OSError:
+        pass
 
-def get_default_css():
-    """Get default CSS styling for PDF"""
-    return """
-        @page {
-            size: A4;
-            margin: 2cm;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            line-height: 1.6;
-            color: #333;
-        }
-        
-        h1, h2, h3, h4, h5, h6 {
-            color: #2c3e50;
-            margin-top: 1.5em;
-            margin-bottom: 0.5em;
-        }
-        
-        h1 { font-size: 2em; border-bottom: 2px solid #3498db; padding-bottom: 0.3em; }
-        h2 { font-size: 1.5em; border-bottom: 1px solid #e0e0e0; padding-bottom: 0.3em; }
-        h3 { font-size: 1.25em; }
-        
-        code {
-            background-color: #f4f4f4;
-            padding: 0.2em 0.4em;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-            font-size: 0.9em;
-        }
-        
-        pre {
-            background-color: #f4f4f4;
-            padding: 1em;
-            border-radius: 5px;
-            overflow-x: auto;
-            border-left: 4px solid #3498db;
-        }
-        
-        pre code {
-            background-color: transparent;
-            padding: 0;
-        }
-        
-        table {
-            border-collapse: collapse;
-            width: 100%;
-            margin: 1em 0;
-        }
-        
-        table th, table td {
-            border: 1px solid #ddd;
-            padding: 0.75em;
-            text-align: left;
-        }
-        
-        table th {
-            background-color: #3498db;
-            color: white;
-            font-weight: 600;
-        }
-        
-        table tr:nth-child(even) {
-            background-color: #f9f9f9;
-        }
-        
-        blockquote {
-            border-left: 4px solid #3498db;
-            margin: 1em 0;
-            padding-left: 1em;
-            color: #666;
-            font-style: italic;
-        }
-        
-        a {
-            color: #3498db;
-            text-decoration: none;
-        }
-        
-        a:hover {
-            text-decoration: underline;
-        }
-        
-        img {
-            max-width: 100%;
-            height: auto;
-        }
-        
-        ul, ol {
-            margin: 1em 0;
-            padding-left: 2em;
-        }
-        
-        li {
-            margin: 0.5em 0;
-        }
+async def render_pdf(md_content, output_filename):
     """
+    Render markdown to a PDF response on the DocuMark render pool
+
+    Each render writes to its own temporary file, which is removed once the
+    response has been sent.
+    """
+    fd, output_path = tempfile.mkstemp(suffix='.pdf', prefix='documark_')
+    os.close(fd)
+    success = False
+    try:
+        success, error = await renderer.render(md_content, output_path)
+    except RendererBusy:
+        logger.warning(f"DocuMark render queue full ({renderer.pending} pending), rejecting conversion")
+        raise api_error_response(
+            MessageCode.SERVER_BUSY,
+            headers={'Retry-After': str(renderer.retry_after)},
+            retry_after=renderer.retry_after
+        )
+    except RenderTimeout:
+        logger.error(f"Rendering {output_filename} timed out after {renderer.timeout} seconds")
+        raise api_error_response(MessageCode.RENDER_TIMEOUT, timeout=renderer.timeout)
+    finally:
+        if not success:
+            remove_output(output_path)
+
+    if not success:
+        logger.error(f"Conversion failed: {error}")
+        raise api_error_response(MessageCode.CONVERSION_ERROR, error=error)
+
+    return FileResponse(
+        output_path,
+        media_type='application/pdf',
+        filename=output_filename,
+        background=BackgroundTask(remove_output, output_path)
+    )
 
 @router.post("/convert")
-async def convert(file: UploadFile = File(...)):
-    """Convert markdown file to PDF"""
-    logger.info(f"Converting markdown file: {file.filename}")
+async def convert(request: Request):
+    """Convert markdown file to PDF (multipart `file` field)"""
+    logger.info("Converting markdown file")
+    uploads = []
     try:
-        if not file.filename:
-            raise api_error_response(MessageCode.MISSING_FILES)
+        uploads = await receive_uploads(request, 'file', max_files=1)
+        input_filename = uploads[0].filename
         
-        if not allowed_file(file.filename):
+        if not allowed_file(input_filename):
             raise api_error_response(
                 MessageCode.INVALID_FILE_TYPE,
                 file_type='.md, .markdown, or .txt'
             )
         
         # Read markdown content
-        md_content = (await file.read()).decode('utf-8')
+        md_content = uploads[0].path.read_text(encoding='utf-8')
         
         # Generate output filename
-        input_filename = file.filename
         output_filename = Path(input_filename).stem + '.pdf'
-        output_path = Path(tempfile.gettempdir()) / output_filename
         
         # Convert to PDF
-        success, error = markdown_to_pdf(md_content, str(output_path))
-        
-        if not success:
-            logger.error(f"Conversion failed: {error}")
-            raise api_error_response(MessageCode.CONVERSION_ERROR, error=error)
+        response = await render_pdf(md_content, output_filename)
         
         logger.info(f"Successfully converted to PDF: {output_filename}")
-        # Return PDF file
-        return FileResponse(
-            str(output_path),
-            media_type='application/pdf',
-            filename=output_filename
-        )
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error converting file: {str(e)}", exc_info=True)
         raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+    finally:
+        remove_uploads(uploads)
 
 @router.post("/convert-text")
 async def convert_text(request: ConvertTextRequest):
@@ -245,22 +134,12 @@ async def convert_text(request: ConvertTextRequest):
         
         # Generate output filename
         output_filename = 'markdown_output.pdf'
-        output_path = Path(tempfile.gettempdir()) / output_filename
         
         # Convert to PDF
-        success, error = markdown_to_pdf(md_content, str(output_path))
-        
-        if not success:
-            logger.error(f"Conversion failed: {error}")
-            raise api_error_response(MessageCode.CONVERSION_ERROR, error=error)
+        response = await render_pdf(md_content, output_filename)
         
         logger.info(f"Successfully converted text to PDF: {output_filename}")
-        # Return PDF file
-        return FileResponse(
-            str(output_path),
-            media_type='application/pdf',
-            filename=output_filename
-        )
+        return response
         
     except HTTPException:
         raise
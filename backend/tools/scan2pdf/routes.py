@@ -3,28 +3,46 @@ Scan2PDF - FastAPI Routes
 Image to PDF OCR Converter
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, Request, HTTPException, Header, Query
+from fastapi.responses import Response, StreamingResponse, FileResponse
 from pydantic import BaseModel
 from pathlib import Path
 import json
 import os
+import time
 import tkinter as tk
 from tkinter import filedialog
 from werkzeug.utils import secure_filename
-from PyPDF2 import PdfReader, PdfWriter
-from typing import Optional, List
+from typing import Optional, List, Literal
 
-from backend.utils.image_converter import (
-    create_searchable_pdf, tesseract_available, find_tesseract
+from backend.utils.image_converter import tesseract_available, find_tesseract, get_ocr_engine_name
+from backend.services.scan2pdf_service import (
+    Scan2PDFService, SUPPORTED_EXTENSIONS, get_output_name, run_blocking
 )
-from backend.config import UPLOAD_FOLDER
+from backend.services.scan2pdf_jobs import job_manager
+from backend.services.scan2pdf_progress import batch_events, result_store
+from backend.services.scan2pdf_watcher import get_watcher
+from backend.services.ocr_scheduler import ocr_scheduler
+from backend.utils.ocr_cache import get_ocr_cache
+from backend.utils.pdf_optimizer import PIKEPDF_AVAILABLE
+from backend.utils.pdf_thumbnails import get_thumbnail_cache, PageOutOfRange
+from backend.utils.search_index import get_search_index
+from backend.utils.uploads import receive_uploads
+from backend.config import UPLOAD_FOLDER, SCAN2PDF_PROGRESS_MODE
 from backend.utils.responses import api_success_response, api_error_response
 from backend.utils.messages import MessageCode
 from backend.utils.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
+service = Scan2PDFService()
+
+STREAM_CHUNK_SIZE = 64 * 1024
+RESULT_CHUNK_FILES = 500
+
+class IndexFolderRequest(BaseModel):
+    path: str
+    recursive: bool = False
 
 class ConvertRequest(BaseModel):
     input_files: Optional[List[str]] = []
@@ -32,141 +50,262 @@ class ConvertRequest(BaseModel):
     output_path: str
     skip_existing: bool = True
     combine_pdfs: bool = False
+    execution_mode: Optional[Literal['sequential', 'process']] = None
+    pdf_ocr_mode: Optional[Literal['full', 'smart']] = None
+    combine_order: Optional[List[str]] = None
+    recursive: bool = False
+    incremental: Optional[bool] = None
+    priority: Optional[Literal['interactive', 'bulk']] = None
+    image_only: Optional[bool] = None
+    optimize: Optional[bool] = None
+    progress_mode: Optional[Literal['events', 'batched']] = None
 
 @router.get("/status")
 async def status():
     """Get system status"""
     logger.info("Checking Scan2PDF status")
+    ocr_cache = get_ocr_cache()
+    search_index = get_search_index()
+    thumbnail_cache = get_thumbnail_cache()
+    watcher = get_watcher()
     return api_success_response(
         MessageCode.SUCCESS,
         data={
             'tesseract_available': tesseract_available,
-            'tesseract_path': find_tesseract() or 'Not found'
+            'tesseract_path': find_tesseract() or 'Not found',
+            'ocr_engine': get_ocr_engine_name() if tesseract_available else None,
+            'ocr_cache': ocr_cache.stats() if ocr_cache else None,
+            'pdf_optimizer_available': PIKEPDF_AVAILABLE,
+            'ocr_scheduler': ocr_scheduler.stats(),
+            'search_index': search_index.stats() if search_index else None,
+            'thumbnail_cache': thumbnail_cache.stats() if thumbnail_cache else None,
+            'watcher': watcher.stats() if watcher else None
         }
     )
 
+def convert_params(convert_request: ConvertRequest) -> dict:
+    """Map a convert request onto Scan2PDFService.convert arguments"""
+    return {
+        'input_files': convert_request.input_files or [],
+        'input_path': convert_request.input_path or '',
+        'output_path': convert_request.output_path,
+        'skip_existing': convert_request.skip_existing,
+        'combine_pdfs': convert_request.combine_pdfs,
+        'execution_mode': convert_request.execution_mode,
+        'pdf_ocr_mode': convert_request.pdf_ocr_mode,
+        'combine_order': convert_request.combine_order,
+        'recursive': convert_request.recursive,
+        'incremental': convert_request.incremental,
+        'priority': convert_request.priority,
+        'image_only': convert_request.image_only,
+        'optimize': convert_request.optimize
+    }
+
+def check_admission():
+    """Refuse new conversions with 503 while the OCR queue is full"""
+    if ocr_scheduler.overloaded():
+        logger.warning(f"OCR queue full ({ocr_scheduler.queue_length} waiting), rejecting conversion")
+        raise api_error_response(
+            MessageCode.SERVER_BUSY,
+            headers={'Retry-After': str(ocr_scheduler.retry_after)},
+            retry_after=ocr_scheduler.retry_after
+        )
+
+def format_sse(event: dict, event_id: Optional[int] = None) -> str:
+    """Serialize an event as an SSE frame"""
+    if event_id is not None:
+        return f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+    return f"data: {json.dumps(event)}\n\n"
+
+async def unnumbered(events):
+    """Pair plain events with a None event id for batch_events"""
+    async for event in events:
+        yield None, event
+
 @router.post("/convert")
 async def convert(convert_request: ConvertRequest):
-    """Convert images to PDF with real-time progress via SSE"""
+    """
+    Convert images to PDF with real-time progress via SSE
+    
+    With progress_mode 'batched', events are coalesced into periodic
+    `batch` events and the per-file results are fetched from /results.
+    """
+    check_admission()
+    progress_mode = convert_request.progress_mode or SCAN2PDF_PROGRESS_MODE
+    
     async def generate():
         try:
-            data = convert_request.dict()
-            input_files = data.get('input_files', [])
-            input_path = data.get('input_path', '')
-            output_path = data.get('output_path')
-            skip_existing = data.get('skip_existing', True)
-            combine_pdfs = data.get('combine_pdfs', False)
-            
-            if not output_path:
-                yield f"data: {json.dumps({'type': 'error', 'error': 'Output path is required'})}\n\n"
-                return
-            
-            supported_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif', '.gif', '.pdf'}
-            input_files_list = []
-            
-            if input_files:
-                input_files_list = [Path(f) for f in input_files if Path(f).suffix.lower() in supported_extensions]
-            elif input_path:
-                input_path_obj = Path(input_path)
-                if input_path_obj.is_file():
-                    if input_path_obj.suffix.lower() in supported_extensions:
-                        input_files_list = [input_path_obj]
-                elif input_path_obj.is_dir():
-                    input_files_list = sorted([f for f in input_path_obj.iterdir() 
-                                         if f.suffix.lower() in supported_extensions], reverse=True)
-                else:
-                    yield f"data: {json.dumps({'type': 'error', 'error': 'Input path does not exist'})}\n\n"
-                    return
+            events = service.convert(**convert_params(convert_request))
+            if progress_mode == 'batched':
+                async for _, event in batch_events(unnumbered(events)):
+                    yield format_sse(event)
             else:
-                yield f"data: {json.dumps({'type': 'error', 'error': 'Input files or path is required'})}\n\n"
-                return
-            
-            if not input_files_list:
-                yield f"data: {json.dumps({'type': 'error', 'error': 'No supported files found'})}\n\n"
-                return
-            
-            output_dir = Path(output_path)
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            total_files = len(input_files_list)
-            successful = 0
-            failed = 0
-            skipped = 0
-            files = []
-            successful_pdf_paths = []
-            
-            yield f"data: {json.dumps({'type': 'progress', 'current': 0, 'total': total_files, 'percent': 0})}\n\n"
-            
-            for idx, file_path in enumerate(input_files_list):
-                if file_path.suffix.lower() == '.pdf':
-                    pdf_name = file_path.stem + '_ocr.pdf'
-                else:
-                    pdf_name = file_path.stem + '.pdf'
-                pdf_path = output_dir / pdf_name
-                
-                input_file_name = file_path.name
-                yield f"data: {json.dumps({'type': 'file_start', 'file': input_file_name, 'index': idx + 1, 'total': total_files})}\n\n"
-                
-                success, message = create_searchable_pdf(file_path, pdf_path, skip_if_exists=skip_existing)
-                
-                if success:
-                    if "already exists" in message.lower() or "skipped" in message.lower():
-                        skipped += 1
-                        file_status = 'skipped'
-                        if pdf_path.exists():
-                            successful_pdf_paths.append(pdf_path)
-                    else:
-                        successful += 1
-                        file_status = 'success'
-                        successful_pdf_paths.append(pdf_path)
-                else:
-                    failed += 1
-                    file_status = 'failed'
-                
-                files.append({
-                    'name': pdf_name,
-                    'status': file_status,
-                    'message': message
-                })
-                
-                progress_percent = int(((idx + 1) / total_files) * 100)
-                output_file_path = str(pdf_path) if file_status in ['success', 'skipped'] else None
-                yield f"data: {json.dumps({'type': 'file_complete', 'file': input_file_name, 'output_file': pdf_name, 'output_path': output_file_path, 'status': file_status, 'message': message, 'current': idx + 1, 'total': total_files, 'percent': progress_percent})}\n\n"
-            
-            # Combine PDFs if requested
-            if combine_pdfs and successful_pdf_paths:
-                try:
-                    successful_pdf_paths = sorted(successful_pdf_paths, reverse=True)
-                    combined_path = output_dir / 'combined.pdf'
-                    
-                    yield f"data: {json.dumps({'type': 'combining', 'message': f'Combining {len(successful_pdf_paths)} PDFs...'})}\n\n"
-                    
-                    writer = PdfWriter()
-                    for pdf_path in successful_pdf_paths:
-                        reader = PdfReader(str(pdf_path))
-                        for page in reader.pages:
-                            writer.add_page(page)
-                    
-                    with open(combined_path, 'wb') as f:
-                        writer.write(f)
-                    
-                    files.append({
-                        'name': 'combined.pdf',
-                        'status': 'success',
-                        'message': f'Combined {len(successful_pdf_paths)} PDFs'
-                    })
-                    
-                    yield f"data: {json.dumps({'type': 'combined', 'file': 'combined.pdf', 'output_path': str(combined_path), 'count': len(successful_pdf_paths)})}\n\n"
-                except Exception as e:
-                    yield f"data: {json.dumps({'type': 'error', 'error': f'Failed to combine PDFs: {str(e)}'})}\n\n"
-            
-            yield f"data: {json.dumps({'type': 'complete', 'successful': successful, 'failed': failed, 'skipped': skipped, 'total': total_files, 'files': files})}\n\n"
-            
+                async for event in events:
+                    yield format_sse(event)
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+            logger.error(f"Error converting files: {str(e)}", exc_info=True)
+            yield format_sse({'type': 'error', 'error': str(e)})
+    
+    return StreamingResponse(generate(), media_type='text/event-stream')
+
+@router.post("/convert/{conversion_id}/cancel")
+async def cancel_conversion(conversion_id: str):
+    """
+    Cancel a streaming conversion by the conversion_id of its first progress event
+    
+    Closing the event stream cancels the conversion as well.
+    """
+    if not service.cancel(conversion_id):
+        raise api_error_response(MessageCode.CONVERSION_NOT_FOUND, conversion_id=conversion_id)
+    return api_success_response(
+        MessageCode.CANCELLATION_REQUESTED,
+        data={'conversion_id': conversion_id}
+    )
+
+@router.post("/jobs")
+async def submit_job(convert_request: ConvertRequest):
+    """Start a conversion that keeps running if the client disconnects"""
+    check_admission()
+    job = job_manager.submit(convert_params(convert_request))
+    return api_success_response(
+        MessageCode.CONVERSION_STARTED,
+        data=job.to_dict()
+    )
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Get conversion job status"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise api_error_response(MessageCode.JOB_NOT_FOUND, job_id=job_id)
+    return api_success_response(MessageCode.SUCCESS, data=job.to_dict())
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a conversion job; its event stream ends with the partial results"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise api_error_response(MessageCode.JOB_NOT_FOUND, job_id=job_id)
+    job_manager.cancel(job)
+    return api_success_response(MessageCode.CANCELLATION_REQUESTED, data=job.to_dict())
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    progress_mode: Optional[Literal['events', 'batched']] = Query(None)
+):
+    """
+    Stream job events via SSE
+    
+    Reconnecting clients resume after the Last-Event-ID header (sent
+    automatically by EventSource) or the last_event_id query parameter.
+    In batched mode the job's results are stored under the job id.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise api_error_response(MessageCode.JOB_NOT_FOUND, job_id=job_id)
+    
+    resume_from = last_event_id or 0
+    if last_event_id_header and last_event_id_header.isdigit():
+        resume_from = int(last_event_id_header)
+    
+    async def generate():
+        events = job_manager.stream(job, resume_from)
+        if (progress_mode or SCAN2PDF_PROGRESS_MODE) == 'batched':
+            events = batch_events(events, result_id=job.id)
+        async for event_id, event in events:
+            yield format_sse(event, event_id)
     
     return StreamingResponse(generate(), media_type='text/event-stream')
 
+@router.get("/results/{result_id}")
+async def conversion_results(
+    result_id: str,
+    limit: int = Query(RESULT_CHUNK_FILES, ge=1, le=5000),
+    offset: int = Query(0, ge=0)
+):
+    """Get a page of the per-file results of a batched conversion"""
+    files = result_store.get(result_id)
+    if files is None:
+        raise api_error_response(MessageCode.RESULT_NOT_FOUND, result_id=result_id)
+    return api_success_response(
+        MessageCode.SUCCESS,
+        data={
+            'result_id': result_id,
+            'total': len(files),
+            'offset': offset,
+            'limit': limit,
+            'files': files[offset:offset + limit]
+        }
+    )
+
+@router.get("/results/{result_id}/download")
+async def download_results(result_id: str):
+    """Download all per-file results of a batched conversion as a JSON array"""
+    files = result_store.get(result_id)
+    if files is None:
+        raise api_error_response(MessageCode.RESULT_NOT_FOUND, result_id=result_id)
+    
+    def iter_json():
+        yield '['
+        for start in range(0, len(files), RESULT_CHUNK_FILES):
+            chunk = ',\n'.join(json.dumps(f) for f in files[start:start + RESULT_CHUNK_FILES])
+            yield (',\n' if start else '') + chunk
+        yield ']\n'
+    
+    return StreamingResponse(
+        iter_json(),
+        media_type='application/json',
+        headers={'Content-Disposition': f'attachment; filename="scan2pdf_results_{result_id}.json"'}
+    )
+
+@router.get("/search")
+async def search(
+    q: str,
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0)
+):
+    """Search the text of converted PDFs, returning matching pages with snippets"""
+    search_index = get_search_index()
+    if search_index is None:
+        raise api_error_response(MessageCode.SEARCH_NOT_AVAILABLE)
+    if not q.strip():
+        raise api_error_response(MessageCode.MISSING_CONTENT)
+    
+    started = time.perf_counter()
+    try:
+        results = await run_blocking(search_index.search, q, limit, offset)
+    except Exception as e:
+        logger.error(f"Error searching for {q!r}: {str(e)}", exc_info=True)
+        raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+    return api_success_response(
+        MessageCode.SUCCESS,
+        data={
+            'query': q,
+            'results': results,
+            'took_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+    )
+
+@router.post("/search/index")
+async def index_folder(index_request: IndexFolderRequest):
+    """Index PDFs that already exist in a folder (e.g. outputs from before indexing was enabled)"""
+    search_index = get_search_index()
+    if search_index is None:
+        raise api_error_response(MessageCode.SEARCH_NOT_AVAILABLE)
+    if not Path(index_request.path).is_dir():
+        raise api_error_response(MessageCode.FILE_NOT_FOUND, file=index_request.path)
+    
+    logger.info(f"Indexing PDFs in {index_request.path}")
+    try:
+        counts = await run_blocking(search_index.index_folder, index_request.path, index_request.recursive)
+    except Exception as e:
+        logger.error(f"Error indexing folder: {str(e)}", exc_info=True)
+        raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+    return api_success_response(MessageCode.SUCCESS, data=counts)
+
 @router.post("/browse-files")
 async def browse_files():
     """Open native file picker for files"""
@@ -206,27 +345,25 @@ async def browse_files():
         raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
 
 @router.post("/upload-files")
-async def upload_files(files: list[UploadFile] = File(...)):
-    """Upload files from drag-and-drop"""
-    logger.info(f"Uploading {len(files)} file(s)")
+async def upload_files(request: Request):
+    """
+    Upload files from drag-and-drop
+    
+    Multipart form data with a `files` field. Files are streamed to
+    UPLOAD_FOLDER as they arrive.
+    """
+    logger.info("Uploading files")
     try:
-        if not files:
-            raise api_error_response(MessageCode.MISSING_FILES)
-        
-        uploaded_files = []
-        for file in files:
-            if file.filename:
-                filename = secure_filename(file.filename)
-                filepath = UPLOAD_FOLDER / filename
-                contents = await file.read()
-                with open(filepath, 'wb') as f:
-                    f.write(contents)
-                uploaded_files.append(str(filepath))
+        uploads = await receive_uploads(request, 'files', dest_dir=UPLOAD_FOLDER)
+        uploaded_files = [str(upload.path) for upload in uploads]
         
         logger.info(f"Successfully uploaded {len(uploaded_files)} file(s)")
         return api_success_response(
             MessageCode.FILE_UPLOAD_SUCCESS,
-            data={'files': uploaded_files},
+            data={
+                'files': uploaded_files,
+                'uploads': [upload.to_dict() for upload in uploads]
+            },
             count=len(uploaded_files)
         )
     except HTTPException:
@@ -235,6 +372,59 @@ async def upload_files(files: list[UploadFile] = File(...)):
         logger.error(f"Error uploading files: {str(e)}", exc_info=True)
         raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
 
+@router.post("/convert-upload")
+async def convert_upload(
+    request: Request,
+    pdf_ocr_mode: Optional[Literal['full', 'smart']] = Query(None),
+    image_only: Optional[bool] = Query(None),
+    optimize: Optional[bool] = Query(None)
+):
+    """
+    Convert a single uploaded file and stream the searchable PDF back
+    
+    Direct mode for drag-and-drop: the `file` field is OCR'd from memory
+    without being written to UPLOAD_FOLDER or an output directory.
+    """
+    logger.info("Converting upload")
+    check_admission()
+    try:
+        upload = (await receive_uploads(request, 'file', in_memory=True, max_files=1))[0]
+        filename = upload.filename
+        
+        if Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+            raise api_error_response(
+                MessageCode.INVALID_FILE_TYPE,
+                file_type=', '.join(sorted(SUPPORTED_EXTENSIONS))
+            )
+        
+        success, message, pdf_bytes, _stats = await service.convert_upload(
+            upload.data, filename, pdf_ocr_mode, image_only, optimize)
+        del upload
+        if not success:
+            logger.error(f"Conversion failed: {message}")
+            raise api_error_response(MessageCode.CONVERSION_ERROR, error=message)
+        
+        def iter_pdf():
+            view = memoryview(pdf_bytes)
+            for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+                yield view[offset:offset + STREAM_CHUNK_SIZE]
+        
+        output_name = get_output_name(Path(secure_filename(filename) or 'upload.pdf'))
+        logger.info(f"Successfully converted upload: {output_name} ({message})")
+        return StreamingResponse(
+            iter_pdf(),
+            media_type='application/pdf',
+            headers={
+                'Content-Disposition': f'attachment; filename="{output_name}"',
+                'Content-Length': str(len(pdf_bytes))
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error converting upload: {str(e)}", exc_info=True)
+        raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+
 @router.post("/browse-folder")
 async def browse_folder():
     """Open native folder picker"""
@@ -263,7 +453,12 @@ async def browse_folder():
 
 @router.get("/preview-pdf")
 async def preview_pdf(path: str):
-    """Preview PDF file"""
+    """
+    Preview PDF file
+    
+    Served inline with HTTP Range support, so viewers can fetch the pages
+    they show instead of the whole document.
+    """
     logger.info(f"Previewing PDF: {path}")
     try:
         file_path = Path(path)
@@ -276,7 +471,8 @@ async def preview_pdf(path: str):
         return FileResponse(
             str(file_path),
             media_type='application/pdf',
-            filename=file_path.name
+            filename=file_path.name,
+            content_disposition_type='inline'
         )
     except HTTPException:
         raise
@@ -284,3 +480,40 @@ async def preview_pdf(path: str):
         logger.error(f"Error previewing PDF: {str(e)}", exc_info=True)
         raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
 
+@router.get("/preview-thumbnail")
+async def preview_thumbnail(
+    path: str,
+    page: int = Query(1, ge=1),
+    dpi: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Render one page of a PDF as a JPEG thumbnail, cached until the PDF changes
+    
+    The ETag is the cache key, which changes with the PDF, so a client
+    revalidating an unchanged page gets 304 Not Modified.
+    """
+    thumbnail_cache = get_thumbnail_cache()
+    if thumbnail_cache is None:
+        raise api_error_response(MessageCode.PREVIEW_NOT_AVAILABLE)
+    
+    file_path = Path(path)
+    if not file_path.suffix.lower() == '.pdf':
+        raise api_error_response(MessageCode.INVALID_FILE_TYPE, file_type='PDF')
+    if not await run_blocking(file_path.is_file):
+        raise api_error_response(MessageCode.FILE_NOT_FOUND, file=path)
+    
+    try:
+        thumbnail_path = await run_blocking(thumbnail_cache.get_thumbnail, file_path, page, dpi)
+    except PageOutOfRange as e:
+        raise api_error_response(MessageCode.VALIDATION_ERROR, error=str(e))
+    except Exception as e:
+        logger.error(f"Error rendering thumbnail: {str(e)}", exc_info=True)
+        raise api_error_response(MessageCode.PROCESSING_ERROR, error=str(e))
+    
+    # The URL does not change when the PDF does, so clients must revalidate
+    headers = {'ETag': f'"{thumbnail_path.stem}"', 'Cache-Control': 'no-cache'}
+    if if_none_match == headers['ETag']:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(thumbnail_path), media_type='image/jpeg', headers=headers)
+
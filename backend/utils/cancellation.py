@@ -0,0 +1,115 @@
+"""
+Conversion Cancellation
+Cancel flag shared between the event loop, worker threads and worker processes
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import Optional, Set
+
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CANCELLED_MESSAGE = "Conversion cancelled"
+
+
+class ConversionCancelled(Exception):
+    """Raised inside a conversion once its CancelToken is cancelled"""
+
+    def __init__(self):
+        super().__init__(CANCELLED_MESSAGE)
+
+
+class CancelToken:
+    """
+    Cancellation flag for one conversion
+
+    In this process the flag is a threading.Event. Worker processes receive
+    a pickled copy, so cancel() also creates a marker file that they check
+    between pages and while tesseract or pdftoppm runs. close() removes the
+    marker, waiting for any worker futures registered with track() to
+    finish first.
+    """
+
+    def __init__(self):
+        self.marker_path = os.path.join(tempfile.gettempdir(), f"toolhub_cancel_{uuid.uuid4().hex}")
+        self._event = threading.Event()
+        self._async_event: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self._workers: Set[Future] = set()
+        self._closing = False
+
+    def __getstate__(self):
+        return {'marker_path': self.marker_path}
+
+    def __setstate__(self, state):
+        self.marker_path = state['marker_path']
+        self._event = threading.Event()
+        self._async_event = None
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._closing = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or os.path.exists(self.marker_path)
+
+    def cancel(self):
+        """Flag the conversion as cancelled (call from the event loop)"""
+        if self._event.is_set():
+            return
+        self._event.set()
+        with self._lock:
+            if self._workers or not self._closing:
+                try:
+                    open(self.marker_path, 'w').close()
+                except OSError as e:
+                    logger.warning(f"Failed to create cancel marker: {str(e)}")
+        if self._async_event is not None:
+            self._async_event.set()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            ConversionCancelled: If the conversion has been cancelled
+        """
+        if self.cancelled:
+            raise ConversionCancelled()
+
+    async def wait(self):
+        """Wait until the conversion is cancelled"""
+        if self._async_event is None:
+            self._async_event = asyncio.Event()
+        if self._event.is_set():
+            return
+        await self._async_event.wait()
+
+    def track(self, future: Future):
+        """Keep the marker until a future running in a worker process has finished"""
+        with self._lock:
+            self._workers.add(future)
+        future.add_done_callback(self._worker_done)
+
+    def _worker_done(self, future: Future):
+        with self._lock:
+            self._workers.discard(future)
+            if self._closing and not self._workers:
+                self._remove_marker()
+
+    def close(self):
+        """Remove the marker once no tracked worker can still read it"""
+        with self._lock:
+            self._closing = True
+            if not self._workers:
+                self._remove_marker()
+
+    def _remove_marker(self):
+        try:
+            os.unlink(self.marker_path)
+        except OSError:
+            pass
@@ -3,20 +3,50 @@ Image to PDF OCR Converter - Core Logic
 Shared utility module for image-to-pdf conversion
 """
 
+import functools
 import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from PIL import Image
 import pytesseract
 import img2pdf
-from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2 import PdfReader, PdfWriter, Transformation
 from io import BytesIO
 
+from backend.config import (
+    SCAN2PDF_PAGE_WORKERS, SCAN2PDF_MAX_INFLIGHT_PAGES,
+    SCAN2PDF_OCR_LANGUAGE, SCAN2PDF_OCR_DPI, SCAN2PDF_OCR_CONFIG, SCAN2PDF_PDF_OCR_MODE,
+    SCAN2PDF_OCR_ENGINE, SCAN2PDF_OCR_PREPROCESS
+)
+from backend.utils.pdf_optimizer import (
+    PIKEPDF_AVAILABLE, get_optimize_params, optimize_pdf_bytes, optimize_pdf_file
+)
+from backend.utils.cancellation import ConversionCancelled, CANCELLED_MESSAGE
+from backend.utils.pdf_merge import StreamingPdfMerger
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import pdfinfo_from_path, pdfinfo_from_bytes
     PDF2IMAGE_AVAILABLE = True
 except ImportError:
     PDF2IMAGE_AVAILABLE = False
 
+# Optional in-process Tesseract bindings (keeps the language model loaded)
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 def get_tesseract_paths():
     """Get list of possible Tesseract installation paths"""
     username = os.getenv('USERNAME', '')
@@ -46,11 +76,608 @@ def find_tesseract():
     
     return None
 
+class OCREngine:
+    """Base class for OCR backends that render a page image as a searchable PDF"""
+    
+    name = 'base'
+    
+    def image_to_pdf(self, img, text_only=False, cancel_token=None):
+        """
+        OCR an image and return a single-page searchable PDF as bytes
+        
+        img is a PIL image or the path of an image file, which Tesseract
+        then reads directly. With text_only the page holds just the
+        invisible text layer, for laying over a different rendition of the
+        image. Engines that can stop mid-page raise ConversionCancelled
+        once cancel_token is cancelled; the others finish the page.
+        """
+        raise NotImplementedError
+    
+    def close(self):
+        """Release engine resources"""
+        pass
+
+# How often a running tesseract process checks whether its conversion was cancelled
+CANCEL_POLL_SECONDS = 0.2
+
+class PytesseractEngine(OCREngine):
+    """
+    Runs the tesseract CLI through pytesseract, one subprocess per page
+    
+    With a cancel_token the subprocess is started here instead, so it can
+    be killed as soon as the conversion is cancelled.
+    """
+    
+    name = 'pytesseract'
+    
+    def image_to_pdf(self, img, text_only=False, cancel_token=None):
+        config = SCAN2PDF_OCR_CONFIG
+        if text_only:
+            config = f"{config} -c textonly_pdf=1".strip()
+        if cancel_token is not None:
+            return self.run_cancellable(img, config, cancel_token)
+        return pytesseract.image_to_pdf_or_hocr(
+            img, extension='pdf', lang=SCAN2PDF_OCR_LANGUAGE, config=config
+        )
+    
+    @staticmethod
+    def run_cancellable(img, config, cancel_token):
+        """
+        pytesseract.image_to_pdf_or_hocr(extension='pdf') that kills tesseract on cancel
+        
+        Raises:
+            ConversionCancelled: If cancel_token was cancelled while tesseract ran
+            pytesseract.TesseractError: If tesseract failed
+        """
+        tess = pytesseract.pytesseract
+        with tess.save(img) as (temp_name, input_filename):
+            cmd = [tess.tesseract_cmd, input_filename, temp_name, '-l', SCAN2PDF_OCR_LANGUAGE,
+                   *shlex.split(config, posix=os.name != 'nt'), 'pdf']
+            try:
+                proc = subprocess.Popen(cmd, **tess.subprocess_args(include_stdout=False))
+            except FileNotFoundError:
+                raise pytesseract.TesseractNotFoundError()
+            with proc:
+                while True:
+                    try:
+                        _, error_string = proc.communicate(timeout=CANCEL_POLL_SECONDS)
+                        break
+                    except subprocess.TimeoutExpired:
+                        if cancel_token.cancelled:
+                            proc.kill()
+                            raise ConversionCancelled()
+            if proc.returncode:
+                raise pytesseract.TesseractError(proc.returncode, tess.get_errors(error_string))
+            with open(f"{temp_name}.pdf", 'rb') as f:
+                return f.read()
+
+class TesserocrEngine(OCREngine):
+    """
+    Long-lived libtesseract instance via tesserocr
+    
+    The language model is loaded once when the engine is created and reused
+    for every page the engine processes.
+    """
+    
+    name = 'tesserocr'
+    # libtesseract cannot be interrupted mid-page, so cancel_token is only honoured between pages
+    
+    def __init__(self):
+        psm, oem, variables = self.parse_config(SCAN2PDF_OCR_CONFIG)
+        kwargs = {'lang': SCAN2PDF_OCR_LANGUAGE}
+        tessdata_dir = get_tessdata_dir()
+        if tessdata_dir:
+            kwargs['path'] = tessdata_dir
+        if oem is not None:
+            kwargs['oem'] = tesserocr.OEM(oem)
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        if psm is not None:
+            self.api.SetPageSegMode(tesserocr.PSM(psm))
+        for name, value in variables.items():
+            self.api.SetVariable(name, value)
+        self.api.SetVariable('tessedit_create_pdf', '1')
+        self.scratch_dir = tempfile.mkdtemp(prefix='toolhub_ocr_')
+    
+    @staticmethod
+    def parse_config(config):
+        """
+        Translate a tesseract CLI config string into API settings
+        
+        Raises:
+            ValueError: If the config uses flags the API cannot express
+        """
+        psm = oem = None
+        variables = {}
+        tokens = shlex.split(config or '')
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token in ('--psm', '--oem') and i + 1 < len(tokens):
+                if token == '--psm':
+                    psm = int(tokens[i + 1])
+                else:
+                    oem = int(tokens[i + 1])
+                i += 2
+            elif token == '-c' and i + 1 < len(tokens) and '=' in tokens[i + 1]:
+                name, value = tokens[i + 1].split('=', 1)
+                variables[name] = value
+                i += 2
+            else:
+                raise ValueError(f"Unsupported tesseract option for tesserocr: {token}")
+        return psm, oem, variables
+    
+    def image_to_pdf(self, img, text_only=False, cancel_token=None):
+        self.api.SetVariable('textonly_pdf', '1' if text_only else '0')
+        outputbase = os.path.join(self.scratch_dir, 'page')
+        if isinstance(img, str):
+            processed = self.api.ProcessPages(outputbase, img)
+        else:
+            processed = self.api.ProcessPage(outputbase, img, 0, '')
+        if not processed:
+            raise RuntimeError("Tesseract failed to process page")
+        pdf_path = outputbase + '.pdf'
+        try:
+            with open(pdf_path, 'rb') as f:
+                return f.read()
+        finally:
+            os.unlink(pdf_path)
+    
+    def close(self):
+        self.api.End()
+        shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+def get_tessdata_dir():
+    """Get the tessdata folder next to a detected Tesseract install, if any"""
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+    if os.path.isabs(tesseract_cmd):
+        tessdata_dir = os.path.join(os.path.dirname(tesseract_cmd), 'tessdata')
+        if os.path.isdir(tessdata_dir):
+            return tessdata_dir
+    return None
+
+class OCREnginePool:
+    """
+    Pool of warm OCR engines shared across files and requests
+    
+    Engines are created on demand and kept idle between uses, up to
+    max_idle per process. An engine that raises is discarded rather than
+    returned to the pool.
+    """
+    
+    def __init__(self, factory, max_idle):
+        self.factory = factory
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            engine = self._idle.pop() if self._idle else None
+        if engine is None:
+            engine = self.factory()
+        try:
+            yield engine
+        except Exception:
+            engine.close()
+            raise
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(engine)
+                return
+        engine.close()
+    
+    def warm(self, count=1):
+        """Create engines ahead of time so the first page does not pay for model loading"""
+        engines = [self.factory() for _ in range(count)]
+        with self._lock:
+            for engine in engines:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(engine)
+                else:
+                    engine.close()
+    
+    def close(self):
+        with self._lock:
+            engines, self._idle = self._idle, []
+        for engine in engines:
+            engine.close()
+
+_engine_pool = None
+_engine_pool_pid = None
+_engine_pool_lock = threading.Lock()
+
+def _create_engine_pool():
+    """Pick the configured OCR backend, falling back to pytesseract"""
+    backend = SCAN2PDF_OCR_ENGINE
+    if backend in ('auto', 'tesserocr') and TESSEROCR_AVAILABLE:
+        try:
+            pool = OCREnginePool(TesserocrEngine, SCAN2PDF_PAGE_WORKERS)
+            pool.warm(1)
+            return pool
+        except Exception as e:
+            logger.warning(f"tesserocr engine unavailable, falling back to pytesseract: {str(e)}")
+    elif backend == 'tesserocr':
+        logger.warning("tesserocr is not installed, falling back to pytesseract")
+    return OCREnginePool(PytesseractEngine, SCAN2PDF_PAGE_WORKERS)
+
+def get_engine_pool():
+    """Get this process's OCR engine pool, creating it on first use"""
+    global _engine_pool, _engine_pool_pid
+    with _engine_pool_lock:
+        # Engines inherited through fork belong to the parent process
+        if _engine_pool is None or _engine_pool_pid != os.getpid():
+            _engine_pool = _create_engine_pool()
+            _engine_pool_pid = os.getpid()
+            logger.info(f"OCR engine pool ready ({_engine_pool.factory.name})")
+        return _engine_pool
+
+def check_tesseract():
+    """
+    Check whether OCR can actually run in this process
+    
+    The tesseract CLI counts once it is found. tesserocr imports without
+    tessdata or the configured language, so it only counts if the engine
+    pool managed to start a TesserocrEngine.
+    """
+    if find_tesseract() is not None:
+        return True
+    if TESSEROCR_AVAILABLE and SCAN2PDF_OCR_ENGINE in ('auto', 'tesserocr'):
+        return get_engine_pool().factory is TesserocrEngine
+    return False
+
 # Check Tesseract availability
-tesseract_available = find_tesseract() is not None
+tesseract_available = check_tesseract()
+
+def get_ocr_engine_name():
+    """Get the name of the OCR backend in use"""
+    return get_engine_pool().factory.name
+
+@functools.lru_cache(maxsize=None)
+def get_engine_version(name):
+    """Get the Tesseract version behind an OCR backend, or 'unknown'"""
+    try:
+        if name == 'tesserocr':
+            return tesserocr.tesseract_version().splitlines()[0]
+        return f"tesseract {pytesseract.get_tesseract_version()}"
+    except Exception:
+        return 'unknown'
+
+def get_ocr_engine_id():
+    """Identify the OCR backend and Tesseract version in use, e.g. 'pytesseract tesseract 5.3.0'"""
+    name = get_ocr_engine_name()
+    return f"{name} {get_engine_version(name)}"
+
+def warm_ocr_engines():
+    """Load one OCR engine up front; used as the process pool initializer"""
+    try:
+        get_engine_pool().warm(1)
+    except Exception as e:
+        logger.warning(f"Failed to warm OCR engine: {str(e)}")
+
+def shutdown_ocr_engines():
+    """Close idle OCR engines in this process"""
+    global _engine_pool
+    with _engine_pool_lock:
+        if _engine_pool is not None and _engine_pool_pid == os.getpid():
+            _engine_pool.close()
+        _engine_pool = None
+
+def ocr_image_to_pdf(img, source=None, cancel_token=None):
+    """
+    OCR a PIL image with a pooled engine and return searchable PDF bytes
+    
+    With an OCR preprocessing profile configured, Tesseract reads a reduced
+    copy of the image (see ocr_preprocessed_image); source is the original
+    image path or bytes, embedded as-is when given. cancel_token is passed
+    on to the engine (see OCREngine.image_to_pdf).
+    """
+    if SCAN2PDF_OCR_PREPROCESS in PREPROCESS_PROFILES:
+        return ocr_preprocessed_image(img, source, PREPROCESS_PROFILES[SCAN2PDF_OCR_PREPROCESS],
+                                      cancel_token)
+    with get_engine_pool().acquire() as engine:
+        return engine.image_to_pdf(img, cancel_token=cancel_token)
+
+# OCR preprocessing profiles: the DPI Tesseract reads at, whether the image is
+# binarized up front and whether page orientation is detected and corrected
+PREPROCESS_PROFILES = {
+    'fast': {'dpi': 200, 'binarize': True, 'detect_orientation': False},
+    'accurate': {'dpi': 300, 'binarize': False, 'detect_orientation': True}
+}
+
+# DPI metadata below this is treated as missing (cameras write 72)
+MIN_TRUSTED_DPI = 150
+# Long side of an A4 page, used to estimate the resolution of photos and rasters
+PAGE_LONG_SIDE_INCHES = 11.69
+# Longest side of the proxy image used for orientation detection
+ORIENTATION_PROXY_SIZE = 1200
+# Minimum Tesseract OSD confidence before a page is rotated
+ORIENTATION_MIN_CONFIDENCE = 10.0
+# JPEG quality for page images that have to be re-encoded
+PAGE_JPEG_QUALITY = 90
+LOSSLESS_FORMATS = {'PNG', 'TIFF', 'BMP', 'GIF'}
 
-def create_searchable_pdf_from_image(image_path, output_path, skip_if_exists=True):
-    """Create a searchable PDF from an image using OCR"""
+# Clockwise correction angle reported by Tesseract OSD -> PIL transpose
+ORIENTATION_TRANSPOSE = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90
+}
+
+def estimate_dpi(img):
+    """Get an image's resolution from its metadata, or estimate it from a page-sized scan"""
+    dpi = img.info.get('dpi')
+    if dpi and dpi[0] >= MIN_TRUSTED_DPI:
+        return float(dpi[0])
+    return max(img.size) / PAGE_LONG_SIDE_INCHES
+
+def otsu_threshold(histogram):
+    """Get the gray level that best separates ink from paper (Otsu's method)"""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    weight_dark = weighted_dark = 0
+    best_variance, threshold = 0.0, 127
+    for level, count in enumerate(histogram):
+        weight_dark += count
+        weight_light = total - weight_dark
+        if not weight_dark:
+            continue
+        if not weight_light:
+            break
+        weighted_dark += level * count
+        mean_dark = weighted_dark / weight_dark
+        mean_light = (weighted_total - weighted_dark) / weight_light
+        variance = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+        if variance > best_variance:
+            best_variance, threshold = variance, level
+    return threshold
+
+def detect_orientation(img):
+    """
+    Get the clockwise rotation that makes a page upright, or 0
+    
+    Runs Tesseract OSD on a small proxy; pages it is unsure about, and
+    installs without the OSD model, are left as they are.
+    """
+    proxy = img.copy()
+    proxy.thumbnail((ORIENTATION_PROXY_SIZE, ORIENTATION_PROXY_SIZE))
+    try:
+        osd = pytesseract.image_to_osd(proxy, output_type=pytesseract.Output.DICT)
+    except Exception as e:
+        logger.debug(f"Orientation detection skipped: {str(e)}")
+        return 0
+    rotate = int(osd.get('rotate', 0)) % 360
+    if rotate in ORIENTATION_TRANSPOSE and float(osd.get('orientation_conf', 0)) >= ORIENTATION_MIN_CONFIDENCE:
+        return rotate
+    return 0
+
+def preprocess_for_ocr(img, profile):
+    """
+    Reduce an image to what Tesseract needs to read it
+    
+    The image is converted to grayscale, downscaled to the profile's DPI
+    and, for the fast profile, binarized with an Otsu threshold.
+    
+    Returns:
+        (OCR image, clockwise rotation applied to it)
+    """
+    ocr_img = img.convert('L')
+    dpi = estimate_dpi(img)
+    if dpi > profile['dpi']:
+        scale = profile['dpi'] / dpi
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        ocr_img = ocr_img.resize(size, Image.LANCZOS, reducing_gap=2.0)
+        dpi = profile['dpi']
+    if profile['binarize']:
+        threshold = otsu_threshold(ocr_img.histogram())
+        ocr_img = ocr_img.point([0] * (threshold + 1) + [255] * (255 - threshold), '1')
+    
+    rotation = detect_orientation(ocr_img) if profile['detect_orientation'] else 0
+    if rotation:
+        ocr_img = ocr_img.transpose(ORIENTATION_TRANSPOSE[rotation])
+    ocr_img.info['dpi'] = (dpi, dpi)
+    return ocr_img, rotation
+
+def encode_page_image(img):
+    """Encode a page image for embedding, PNG for lossless sources and JPEG otherwise"""
+    buffer = BytesIO()
+    dpi = img.info.get('dpi')
+    save_options = {'dpi': dpi} if dpi else {}
+    if img.mode in ('RGB', 'L') and img.format not in LOSSLESS_FORMATS:
+        img.save(buffer, format='JPEG', quality=PAGE_JPEG_QUALITY, **save_options)
+    else:
+        img.save(buffer, format='PNG', **save_options)
+    return buffer.getvalue()
+
+def overlay_text_layer(image_pdf, text_pdf):
+    """Lay a text-only OCR page over an image page, scaled to the same size"""
+    image_page = PdfReader(BytesIO(image_pdf)).pages[0]
+    text_page = PdfReader(BytesIO(text_pdf)).pages[0]
+    scale_x = float(image_page.mediabox.width) / float(text_page.mediabox.width)
+    scale_y = float(image_page.mediabox.height) / float(text_page.mediabox.height)
+    text_page.add_transformation(Transformation().scale(scale_x, scale_y))
+    # merge_page clips to the merged page's box, which must cover the scaled text
+    text_page.mediabox = image_page.mediabox
+    image_page.merge_page(text_page)
+    
+    writer = PdfWriter()
+    writer.add_page(image_page)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def ocr_preprocessed_image(img, source, profile, cancel_token=None):
+    """
+    OCR a reduced copy of an image but keep the original in the PDF
+    
+    Tesseract renders only the text layer of the preprocessed image, which
+    is then scaled onto a page holding the full-resolution image: source
+    embedded without re-encoding when the page needed no rotation, the
+    image itself otherwise.
+    """
+    ocr_img, rotation = preprocess_for_ocr(img, profile)
+    with get_engine_pool().acquire() as engine:
+        text_pdf = engine.image_to_pdf(ocr_img, text_only=True, cancel_token=cancel_token)
+    
+    if rotation:
+        upright = img.transpose(ORIENTATION_TRANSPOSE[rotation])
+        upright.format = img.format
+        upright.info['dpi'] = img.info.get('dpi')
+        image_pdf = img2pdf.convert(encode_page_image(upright))
+    elif source is not None:
+        image_pdf = embed_image_pdf(source)
+    else:
+        image_pdf = img2pdf.convert(encode_page_image(img))
+    return overlay_text_layer(image_pdf, text_pdf)
+
+# Minimum non-whitespace characters for a PDF page to count as already searchable
+TEXT_LAYER_MIN_CHARS = 20
+
+# Converter options that only affect how a file is processed, not the output
+PROCESSING_OPTIONS = {'skip_if_exists', 'page_workers', 'cancel_token'}
+
+def get_ocr_params(options=None):
+    """Get the OCR parameters that determine the content of a searchable PDF"""
+    params = {
+        'engine': get_ocr_engine_id(),
+        'lang': SCAN2PDF_OCR_LANGUAGE,
+        'dpi': SCAN2PDF_OCR_DPI,
+        'config': SCAN2PDF_OCR_CONFIG
+    }
+    for key, value in (options or {}).items():
+        if key not in PROCESSING_OPTIONS:
+            params[key] = value
+    if SCAN2PDF_OCR_PREPROCESS in PREPROCESS_PROFILES:
+        params['preprocess'] = SCAN2PDF_OCR_PREPROCESS
+    if params.get('optimize'):
+        params['optimize'] = get_optimize_params()
+    return params
+
+class StageTimer:
+    """
+    Accumulates wall-clock seconds per conversion stage
+    
+    A stage entered more than once, such as once per page window, adds up.
+    """
+    
+    def __init__(self):
+        self.timings = {}
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+def open_image(source):
+    """
+    Open and fully decode an image from a path or an in-memory buffer
+    
+    Decoding up front surfaces truncated or corrupted files here, so the
+    image does not have to be opened a second time just to verify it.
+    """
+    img = Image.open(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    try:
+        img.load()
+    except Exception:
+        img.close()
+        raise
+    return img
+
+def embed_image_pdf(source):
+    """
+    Wrap an image in a single-page PDF without decoding it
+    
+    img2pdf copies JPEG and JPEG 2000 data into the PDF byte for byte and
+    re-wraps PNG and TIFF data losslessly. Images it cannot embed as-is
+    (those with an alpha channel) are decoded and flattened to RGB first.
+    """
+    if isinstance(source, Path):
+        source = str(source)
+    try:
+        return img2pdf.convert(source)
+    except img2pdf.AlphaChannelError:
+        with open_image(source) as img:
+            buffer = BytesIO()
+            img.convert('RGB').save(buffer, format='PNG')
+        return img2pdf.convert(buffer.getvalue())
+
+def image_only_message():
+    """Describe a PDF created without OCR"""
+    if tesseract_available:
+        return "PDF created without OCR (image-only mode)"
+    return "PDF created without OCR (Tesseract not available)"
+
+def optimize_output(output, timer, stats=None):
+    """
+    Shrink the page images of an OCR'd PDF given as bytes or a file path
+    
+    A file is rewritten in place. Its size before and after is stored in
+    stats['optimize']. Without pikepdf, or if optimization fails, the PDF
+    is left as it is.
+    
+    Returns:
+        The optimized PDF bytes, or the path for file input
+    """
+    if not PIKEPDF_AVAILABLE:
+        return output
+    try:
+        with timer.stage('optimize'):
+            if isinstance(output, (bytes, bytearray)):
+                output, optimize_stats = optimize_pdf_bytes(output)
+            else:
+                optimize_stats = optimize_pdf_file(output)
+    except Exception as e:
+        logger.warning(f"Failed to optimize PDF output: {str(e)}")
+        return output
+    if stats is not None:
+        stats['optimize'] = optimize_stats
+    return output
+
+def image_to_searchable_pdf(img, source, cancel_token=None):
+    """
+    OCR a decoded image into searchable PDF bytes
+    
+    source (the image path or its raw bytes) is embedded as-is with img2pdf
+    when Tesseract is unavailable or OCR fails.
+    
+    Returns:
+        (success, message, pdf_bytes)
+    
+    Raises:
+        ConversionCancelled: If the conversion was cancelled during OCR
+    """
+    if isinstance(source, Path):
+        source = str(source)
+    
+    if not tesseract_available:
+        return True, image_only_message(), embed_image_pdf(source)
+    
+    try:
+        return True, "Searchable PDF created successfully", ocr_image_to_pdf(img, source, cancel_token)
+    except ConversionCancelled:
+        raise
+    except Exception:
+        try:
+            return True, "PDF created without OCR (OCR failed)", img2pdf.convert(source)
+        except Exception as e2:
+            return False, f"Failed to create PDF: {str(e2)}", None
+
+def create_searchable_pdf_from_image(image_path, output_path, skip_if_exists=True, stats=None,
+                                     image_only=False, optimize=False, page_workers=None,
+                                     progress_callback=None, cancel_token=None):
+    """
+    Create a searchable PDF from an image using OCR
+    
+    With image_only, or when Tesseract is unavailable, the image file is
+    embedded without being decoded at all (see embed_image_pdf). Otherwise
+    optimize shrinks the page image of the OCR'd PDF (see optimize_output).
+    Multi-frame TIFFs and GIFs become one page per frame (see ocr_frames);
+    page_workers, progress_callback and cancel_token only apply to those.
+    If a stats dict is given, per-stage timings are stored under 'timings'.
+    """
     if skip_if_exists and Path(output_path).exists():
         try:
             if Path(output_path).stat().st_size > 0:
@@ -61,41 +688,467 @@ def create_searchable_pdf_from_image(image_path, output_path, skip_if_exists=Tru
     if not Path(image_path).exists():
         return False, "Source image file not found"
     
+    timer = StageTimer()
+    if stats is not None:
+        stats['timings'] = timer.timings
+    frame_count = 1 if image_only or not tesseract_available else count_frames(image_path)
+    if image_only or not tesseract_available:
+        try:
+            with timer.stage('embed'):
+                pdf_bytes = embed_image_pdf(image_path)
+        except Exception as e:
+            return False, f"Invalid or corrupted image: {str(e)}"
+        message = image_only_message()
+    elif frame_count > 1:
+        return create_searchable_pdf_from_frames(image_path, output_path, frame_count, timer, stats,
+                                                 optimize, page_workers, progress_callback, cancel_token)
+    else:
+        try:
+            with timer.stage('decode'):
+                img = open_image(image_path)
+        except Exception as e:
+            return False, f"Invalid or corrupted image: {str(e)}"
+        
+        try:
+            with img, timer.stage('ocr'):
+                success, message, pdf_bytes = image_to_searchable_pdf(img, image_path, cancel_token)
+            if success and optimize:
+                pdf_bytes = optimize_output(pdf_bytes, timer, stats)
+        except ConversionCancelled:
+            return False, CANCELLED_MESSAGE
+        except Exception as e:
+            return False, f"Error processing image: {str(e)}"
+        if not success:
+            return False, message
+    
     try:
-        with Image.open(image_path) as test_img:
-            test_img.verify()
+        with timer.stage('write'), open(output_path, 'wb') as f:
+            f.write(pdf_bytes)
+        
+        if Path(output_path).exists() and Path(output_path).stat().st_size > 0:
+            return True, message
+        else:
+            return False, "PDF file was not created properly"
+    except Exception as e:
+        return False, f"Error processing image: {str(e)}"
+
+def create_searchable_pdf_from_frames(image_path, output_path, frame_count, timer, stats=None,
+                                      optimize=False, page_workers=None, progress_callback=None,
+                                      cancel_token=None):
+    """Write a searchable PDF with one page per frame of a multi-frame image"""
+    try:
+        writer, fallback_count = ocr_frames(image_path, frame_count, page_workers, progress_callback, timer,
+                                            cancel_token)
+    except ConversionCancelled:
+        return False, CANCELLED_MESSAGE
+    except RuntimeError as e:
+        return False, str(e)
     except Exception as e:
-        return False, f"Invalid or corrupted image: {str(e)}"
+        return False, f"Error processing image: {str(e)}"
     
     try:
-        img = Image.open(image_path)
+        with timer.stage('write'), open(output_path, 'wb') as f:
+            writer.write(f)
+        if optimize:
+            optimize_output(Path(output_path), timer, stats)
         
-        if not tesseract_available:
-            with open(output_path, 'wb') as f:
-                f.write(img2pdf.convert(str(image_path)))
-            return True, "PDF created without OCR (Tesseract not available)"
+        if stats is not None:
+            stats.update({'pages': frame_count, 'pages_ocr': frame_count - fallback_count,
+                          'pages_passthrough': 0, 'pages_fallback': fallback_count})
         
+        if Path(output_path).exists() and Path(output_path).stat().st_size > 0:
+            return True, frames_result_message(frame_count, fallback_count)
+        else:
+            return False, "PDF file was not created properly"
+    except Exception as e:
+        return False, f"Error processing image: {str(e)}"
+
+def frames_result_message(frame_count, fallback_count=0):
+    """Describe the outcome of OCR'ing a multi-frame image"""
+    if fallback_count == frame_count:
+        return f"PDF created without OCR from {frame_count} frame(s) (OCR failed)"
+    if fallback_count:
+        return (f"Searchable PDF created from {frame_count} frame(s) "
+                f"({frame_count - fallback_count} OCR'd, {fallback_count} without OCR (OCR failed))")
+    return f"Searchable PDF created from {frame_count} frame(s)"
+
+def ocr_page_to_pdf(image_path, cancel_token=None):
+    """
+    OCR a rasterized page file, falling back to a plain image PDF page
+    
+    Returns:
+        (pdf_bytes, whether OCR ran)
+    """
+    try:
+        if SCAN2PDF_OCR_PREPROCESS not in PREPROCESS_PROFILES:
+            return ocr_image_to_pdf(image_path, cancel_token=cancel_token), True
+        with open_image(image_path) as img:
+            # Preprocessing scales by DPI, which PPM files carry no metadata for
+            img.info.setdefault('dpi', (SCAN2PDF_OCR_DPI, SCAN2PDF_OCR_DPI))
+            return ocr_image_to_pdf(img, cancel_token=cancel_token), True
+    except ConversionCancelled:
+        raise
+    except Exception as e:
+        logger.warning(f"OCR failed on {Path(image_path).name}, embedding it without OCR: {str(e)}")
+        buffer = BytesIO()
+        with open_image(image_path) as img:
+            img.save(buffer, format='PNG')
+        return img2pdf.convert(buffer.getvalue()), False
+
+def ocr_page_file(image_path, cancel_token=None):
+    """ocr_page_to_pdf for a scratch page file, deleting the file afterwards"""
+    try:
+        return ocr_page_to_pdf(image_path, cancel_token)
+    finally:
         try:
-            pdf_bytes = pytesseract.image_to_pdf_or_hocr(img, extension='pdf')
-            with open(output_path, 'wb') as f:
-                f.write(pdf_bytes)
-            
-            if Path(output_path).exists() and Path(output_path).stat().st_size > 0:
-                return True, "Searchable PDF created successfully"
-            else:
-                return False, "PDF file was not created properly"
+            os.unlink(image_path)
+        except OSError:
+            pass
+
+def count_frames(source):
+    """Number of frames in an image path or buffer, read without decoding any of them"""
+    try:
+        with Image.open(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source) as img:
+            return getattr(img, 'n_frames', 1)
+    except Exception:
+        return 1
+
+def ocr_frame_to_pdf(source, index, cancel_token=None):
+    """
+    OCR one frame of a multi-frame image, falling back to a plain image PDF page
+    
+    The image is opened afresh and only the requested frame is decoded, so
+    each worker holds a single frame in memory.
+    
+    Returns:
+        (pdf_bytes, whether OCR ran)
+    """
+    with Image.open(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source) as img:
+        img.seek(index)
+        img.load()
+        frame = img
+        if img.mode not in ('1', 'L', 'RGB'):
+            frame = img.convert('RGB')
+            frame.format = img.format
+        if SCAN2PDF_OCR_PREPROCESS in PREPROCESS_PROFILES:
+            frame.info.setdefault('dpi', (SCAN2PDF_OCR_DPI, SCAN2PDF_OCR_DPI))
+        try:
+            return ocr_image_to_pdf(frame, cancel_token=cancel_token), True
+        except ConversionCancelled:
+            raise
         except Exception as e:
+            logger.warning(f"OCR failed on frame {index + 1}, embedding it without OCR: {str(e)}")
+            return img2pdf.convert(encode_page_image(frame)), False
+
+def ocr_frames(source, frame_count, page_workers=None, progress_callback=None,
+               timer=None, cancel_token=None):
+    """
+    Build a searchable PDF with one page per frame of a multi-frame image
+    
+    Frames are OCR'd in windows of at most SCAN2PDF_MAX_INFLIGHT_PAGES, up
+    to page_workers at a time, and merged in frame order; progress_callback
+    (done, total) counts finished frames. source is an image path or bytes.
+    
+    Returns:
+        (PdfWriter, number of frames embedded without OCR because OCR failed)
+    
+    Raises:
+        RuntimeError: If a frame could not be converted at all
+        ConversionCancelled: If the conversion was cancelled
+    """
+    timer = timer or StageTimer()
+    window = SCAN2PDF_MAX_INFLIGHT_PAGES or frame_count
+    page_workers = min(page_workers or SCAN2PDF_PAGE_WORKERS, window)
+    page_to_pdf = functools.partial(ocr_frame_to_pdf, source)
+    writer = PdfWriter()
+    fallback_count = 0
+    
+    for first in range(0, frame_count, window):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        indexes = list(range(first, min(first + window, frame_count)))
+        
+        window_callback = None
+        if progress_callback:
+            window_callback = lambda done, _total, offset=first: progress_callback(offset + done, frame_count)
+        
+        with timer.stage('ocr'):
+            ocr_pdfs = ocr_pages(indexes, page_workers, window_callback, cancel_token, page_to_pdf)
+        
+        with timer.stage('merge'):
+            for pdf_bytes, ocr_ran in ocr_pdfs:
+                fallback_count += not ocr_ran
+                for page in PdfReader(BytesIO(pdf_bytes)).pages:
+                    writer.add_page(page)
+    
+    return writer, fallback_count
+
+def ocr_pages(images, page_workers=1, progress_callback=None, cancel_token=None,
+              page_to_pdf=ocr_page_to_pdf):
+    """
+    OCR rasterized page files, concurrently when page_workers > 1
+    
+    Both OCR backends release the GIL while Tesseract works, so threads are
+    enough to keep several cores busy. Results are returned in page order regardless of which page
+    finished first; progress_callback(done, total) is called as pages finish.
+    Pages not yet started when cancel_token is cancelled are skipped, and
+    running ones stop if their engine can (see OCREngine.image_to_pdf).
+    page_to_pdf(item, cancel_token) turns one item of images into
+    (pdf_bytes, whether OCR ran), which is what the result list holds.
+    
+    Raises:
+        RuntimeError: If a page could not be converted at all
+        ConversionCancelled: If the conversion was cancelled
+    """
+    total = len(images)
+    results = [None] * total
+    
+    def ocr_page(image_path):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return page_to_pdf(image_path, cancel_token)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(page_workers, total))) as executor:
+        futures = {executor.submit(ocr_page, img): i for i, img in enumerate(images)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
             try:
-                with open(output_path, 'wb') as f:
-                    f.write(img2pdf.convert(str(image_path)))
-                return True, f"PDF created without OCR (OCR failed)"
-            except Exception as e2:
-                return False, f"Failed to create PDF: {str(e2)}"
-    except Exception as e:
-        return False, f"Error processing image: {str(e)}"
+                results[i] = future.result()
+            except ConversionCancelled:
+                for pending in futures:
+                    pending.cancel()
+                raise
+            except Exception as e:
+                for pending in futures:
+                    pending.cancel()
+                raise RuntimeError(f"Failed to process page {i+1}: {str(e)}")
+            if progress_callback:
+                progress_callback(done, total)
+    
+    return results
+
+def open_pdf_reader(pdf_path):
+    """
+    Open a PDF for page access, or return None if its pages cannot be read
+    
+    pdf_path may also be a binary stream such as a BytesIO.
+    """
+    try:
+        reader = PdfReader(pdf_path if hasattr(pdf_path, 'read') else str(pdf_path))
+        if reader.is_encrypted:
+            reader.decrypt('')
+        len(reader.pages)
+        return reader
+    except Exception:
+        return None
+
+def has_text_layer(page):
+    """Check whether a PDF page already carries searchable text"""
+    try:
+        text = page.extract_text() or ''
+    except Exception:
+        return False
+    return len(''.join(text.split())) >= TEXT_LAYER_MIN_CHARS
+
+def iter_page_windows(page_numbers, window):
+    """
+    Group 1-based page numbers into (first, last) ranges for rasterization
+    
+    Ranges only span consecutive pages and hold at most `window` pages.
+    """
+    run_start = prev = None
+    for number in page_numbers:
+        if run_start is not None and number == prev + 1 and number - run_start < window:
+            prev = number
+            continue
+        if run_start is not None:
+            yield run_start, prev
+        run_start = prev = number
+    if run_start is not None:
+        yield run_start, prev
+
+def ocr_pdf_pages(source, page_count, rasterize, output, page_workers=None,
+                  progress_callback=None, ocr_mode=None, timer=None, cancel_token=None):
+    """
+    Write a searchable copy of a PDF's pages to output
+    
+    rasterize(first_page, last_page) renders a 1-based page range to image
+    files and returns their paths (see rasterized_pages); each file is
+    deleted as soon as its page is OCR'd.
+    Pages are appended to the binary stream output as each window finishes
+    (see StreamingPdfMerger), so only one window of OCR'd pages is held in
+    memory. output holds a complete PDF only if this returns.
+    In 'smart' mode pages of source (a PdfReader, or None if the PDF could
+    not be parsed) that already have a text layer are copied through.
+    Stage times are added to timer (a StageTimer) if given.
+    cancel_token is checked before each window and each page.
+    
+    Returns:
+        (number of pages OCR'd, number of pages embedded without OCR
+        because OCR failed)
+    
+    Raises:
+        RuntimeError: If a page fails to OCR
+        ConversionCancelled: If the conversion was cancelled
+    """
+    timer = timer or StageTimer()
+    if (ocr_mode or SCAN2PDF_PDF_OCR_MODE) == 'smart' and source is not None:
+        with timer.stage('decode'):
+            ocr_page_numbers = [n for n in range(1, page_count + 1)
+                                if not has_text_layer(source.pages[n - 1])]
+    else:
+        ocr_page_numbers = list(range(1, page_count + 1))
+    
+    # Rasterize and OCR in windows of at most SCAN2PDF_MAX_INFLIGHT_PAGES pages,
+    # so peak memory does not grow with document length
+    window = SCAN2PDF_MAX_INFLIGHT_PAGES or page_count
+    page_workers = min(page_workers or SCAN2PDF_PAGE_WORKERS, window)
+    merger = StreamingPdfMerger(output)
+    next_page = 1
+    fallback_count = 0
+    
+    for first_page, last_page in iter_page_windows(ocr_page_numbers, window):
+        with timer.stage('merge'):
+            if next_page < first_page:
+                merger.append(source, range(next_page - 1, first_page - 1))
+        
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        with timer.stage('rasterize'):
+            images = rasterize(first_page, last_page)
+        
+        window_callback = None
+        if progress_callback:
+            offset = first_page - 1
+            window_callback = lambda done, _total: progress_callback(offset + done, page_count)
+        
+        try:
+            with timer.stage('ocr'):
+                ocr_pdfs = ocr_pages(images, page_workers, window_callback, cancel_token,
+                                     ocr_page_file)
+        finally:
+            # Pages that never started once OCR failed or was cancelled
+            for image_path in images:
+                try:
+                    os.unlink(image_path)
+                except OSError:
+                    pass
+        
+        with timer.stage('merge'):
+            for pdf_bytes, ocr_ran in ocr_pdfs:
+                fallback_count += not ocr_ran
+                merger.append(BytesIO(pdf_bytes))
+        next_page = last_page + 1
+    
+    with timer.stage('merge'):
+        if next_page <= page_count:
+            merger.append(source, range(next_page - 1, page_count))
+    with timer.stage('write'):
+        merger.close()
+    
+    return len(ocr_page_numbers) - fallback_count, fallback_count
+
+def run_pdftoppm(pdf_path, ranges, output_prefix, cancel_token=None):
+    """
+    Render page ranges of a PDF with one pdftoppm process per range
+    
+    Each range (first_page, last_page) is written as PPM files named
+    `<output_prefix>-<range index>-<page>.ppm`. The processes are killed as
+    soon as cancel_token is cancelled, like tesseract in
+    PytesseractEngine.run_cancellable.
+    
+    Raises:
+        ConversionCancelled: If cancel_token was cancelled while rendering
+        RuntimeError: If pdftoppm failed
+    """
+    command = 'pdftoppm.exe' if os.name == 'nt' else 'pdftoppm'
+    procs = []
+    try:
+        for index, (first_page, last_page) in enumerate(ranges):
+            cmd = [command, '-r', str(SCAN2PDF_OCR_DPI), '-f', str(first_page), '-l', str(last_page),
+                   str(pdf_path), f"{output_prefix}-{index}"]
+            procs.append(subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                          creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)))
+        for proc in procs:
+            while True:
+                try:
+                    _, error_string = proc.communicate(timeout=CANCEL_POLL_SECONDS)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        raise ConversionCancelled()
+            if proc.returncode:
+                raise RuntimeError(f"Failed to rasterize PDF: {error_string.decode('utf-8', 'replace').strip()}")
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            if proc.stderr is not None:
+                proc.stderr.close()
+
+@contextmanager
+def rasterized_pages(source, thread_count=1, cancel_token=None):
+    """
+    Provide rasterize(first_page, last_page) for a PDF path or PDF bytes
+    
+    Pages are rendered by pdftoppm straight into a scratch folder and their
+    paths handed on, so OCR engines read the PPM files as written instead
+    of each page being loaded into PIL and saved again for Tesseract. Each
+    range is split across up to thread_count pdftoppm processes, which are
+    killed if cancel_token is cancelled (see run_pdftoppm). The folder is
+    removed on exit.
+    """
+    scratch_dir = tempfile.mkdtemp(prefix='toolhub_raster_')
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            pdf_path = os.path.join(scratch_dir, 'source.pdf')
+            with open(pdf_path, 'wb') as f:
+                f.write(source)
+        else:
+            pdf_path = str(source)
+        
+        def rasterize(first_page, last_page):
+            page_count = last_page - first_page + 1
+            chunk = -(-page_count // max(1, min(thread_count, page_count)))
+            ranges = [(first, min(first + chunk - 1, last_page))
+                      for first in range(first_page, last_page + 1, chunk)]
+            prefix = os.path.join(scratch_dir, f"{first_page}")
+            run_pdftoppm(pdf_path, ranges, prefix, cancel_token)
+            # pdftoppm pads page numbers to the same width within a document
+            return [os.path.join(scratch_dir, name) for name in sorted(
+                (name for name in os.listdir(scratch_dir)
+                 if name.startswith(f"{first_page}-") and name.endswith('.ppm')),
+                key=lambda name: tuple(int(part) for part in name[:-4].split('-')[1:])
+            )]
+        
+        yield rasterize
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
-def create_searchable_pdf_from_pdf(pdf_path, output_path, skip_if_exists=True):
-    """Create a searchable PDF from a non-searchable PDF using OCR"""
+def pdf_result_message(page_count, ocr_count, fallback_count=0):
+    """Describe the outcome of OCR'ing a PDF"""
+    passthrough_count = page_count - ocr_count - fallback_count
+    if fallback_count:
+        return (f"Searchable PDF created from {page_count} page(s) "
+                f"({ocr_count} OCR'd, {passthrough_count} passed through, "
+                f"{fallback_count} without OCR (OCR failed))")
+    if passthrough_count:
+        return (f"Searchable PDF created from {page_count} page(s) "
+                f"({ocr_count} OCR'd, {passthrough_count} passed through)")
+    return f"Searchable PDF created from {page_count} page(s)"
+
+def create_searchable_pdf_from_pdf(pdf_path, output_path, skip_if_exists=True,
+                                   page_workers=None, progress_callback=None,
+                                   ocr_mode=None, stats=None, optimize=False, cancel_token=None):
+    """
+    Create a searchable PDF from a non-searchable PDF using OCR
+    
+    In 'smart' mode pages that already have a text layer are copied through
+    untouched and only image-only pages are rasterized and OCR'd.
+    With optimize, the images of every output page are shrunk afterwards.
+    If cancel_token is cancelled midway, no output is written.
+    """
     if skip_if_exists and Path(output_path).exists():
         try:
             if Path(output_path).stat().st_size > 0:
@@ -112,51 +1165,198 @@ def create_searchable_pdf_from_pdf(pdf_path, output_path, skip_if_exists=True):
     if not PDF2IMAGE_AVAILABLE:
         return False, "pdf2image library not installed"
     
+    timer = StageTimer()
+    if stats is not None:
+        stats['timings'] = timer.timings
     try:
-        images = convert_from_path(str(pdf_path), dpi=300)
+        with timer.stage('decode'):
+            source = open_pdf_reader(pdf_path)
+            if source is not None:
+                page_count = len(source.pages)
+            else:
+                page_count = pdfinfo_from_path(str(pdf_path))["Pages"]
         
-        if not images:
+        if not page_count:
             return False, "No pages found in PDF"
         
-        ocr_pdfs = []
-        for i, img in enumerate(images):
-            try:
-                pdf_bytes = pytesseract.image_to_pdf_or_hocr(img, extension='pdf')
-                ocr_pdfs.append(pdf_bytes)
-            except Exception as e:
-                try:
-                    temp_path = Path(output_path).parent / f"temp_page_{i}.pdf"
-                    with open(temp_path, 'wb') as f:
-                        f.write(img2pdf.convert(img))
-                    with open(temp_path, 'rb') as f:
-                        ocr_pdfs.append(f.read())
-                    temp_path.unlink()
-                except:
-                    return False, f"Failed to process page {i+1}: {str(e)}"
-        
-        writer = PdfWriter()
-        for pdf_bytes in ocr_pdfs:
-            reader = PdfReader(BytesIO(pdf_bytes))
-            for page in reader.pages:
-                writer.add_page(page)
-        
-        with open(output_path, 'wb') as f:
-            writer.write(f)
+        # Pages are written as they are OCR'd; the output only appears once complete
+        tmp_path = Path(output_path).with_name(Path(output_path).name + '.part')
+        try:
+            with rasterized_pages(pdf_path, page_workers or SCAN2PDF_PAGE_WORKERS, cancel_token) as rasterize, \
+                    open(tmp_path, 'wb') as f:
+                ocr_count, fallback_count = ocr_pdf_pages(
+                    source, page_count, rasterize, f, page_workers, progress_callback, ocr_mode, timer,
+                    cancel_token)
+            os.replace(tmp_path, output_path)
+        except ConversionCancelled:
+            return False, CANCELLED_MESSAGE
+        except RuntimeError as e:
+            return False, str(e)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        passthrough_count = page_count - ocr_count - fallback_count
+        
+        if optimize:
+            optimize_output(Path(output_path), timer, stats)
+        
+        if stats is not None:
+            stats.update({
+                'pages': page_count,
+                'pages_ocr': ocr_count,
+                'pages_passthrough': passthrough_count,
+                'pages_fallback': fallback_count
+            })
         
         if Path(output_path).exists() and Path(output_path).stat().st_size > 0:
-            return True, f"Searchable PDF created from {len(images)} page(s)"
+            return True, pdf_result_message(page_count, ocr_count, fallback_count)
         else:
             return False, "PDF file was not created properly"
             
     except Exception as e:
         return False, f"Error processing PDF: {str(e)}"
 
-def create_searchable_pdf(input_path, output_path, skip_if_exists=True):
-    """Create a searchable PDF from an image or PDF file"""
+def create_searchable_pdf(input_path, output_path, skip_if_exists=True,
+                          page_workers=None, progress_callback=None,
+                          ocr_mode=None, stats=None, image_only=False, optimize=False,
+                          cancel_token=None):
+    """
+    Create a searchable PDF from an image or PDF file
+    
+    ocr_mode only applies to PDF input, image_only only to image input;
+    page_workers and progress_callback apply to PDFs and multi-frame images.
+    If a stats dict is given it is filled with page counts for the file,
+    per-stage timings in seconds under 'timings' and, with optimize, the
+    output size before and after optimization under 'optimize'.
+    A cancelled cancel_token (see backend.utils.cancellation) stops the
+    conversion before the next page and returns (False, CANCELLED_MESSAGE).
+    """
     input_path = Path(input_path)
+    if cancel_token is not None and cancel_token.cancelled:
+        return False, CANCELLED_MESSAGE
     
     if input_path.suffix.lower() == '.pdf':
-        return create_searchable_pdf_from_pdf(input_path, output_path, skip_if_exists)
+        return create_searchable_pdf_from_pdf(input_path, output_path, skip_if_exists,
+                                              page_workers, progress_callback, ocr_mode, stats,
+                                              optimize, cancel_token)
     else:
-        return create_searchable_pdf_from_image(input_path, output_path, skip_if_exists)
+        result = create_searchable_pdf_from_image(input_path, output_path, skip_if_exists, stats,
+                                                  image_only, optimize, page_workers,
+                                                  progress_callback, cancel_token)
+        if stats is not None and result[0] and 'pages' not in stats:
+            ocr_count = 0 if 'without ocr' in result[1].lower() else 1
+            stats.update({'pages': 1, 'pages_ocr': ocr_count, 'pages_passthrough': 1 - ocr_count})
+        return result
 
+def create_searchable_pdf_from_bytes(data, filename, page_workers=None,
+                                     progress_callback=None, ocr_mode=None, stats=None,
+                                     image_only=False, optimize=False, cancel_token=None):
+    """
+    Create a searchable PDF from an in-memory image or PDF
+    
+    The input is decoded straight from the data buffer and the result is
+    returned as bytes, so nothing touches the upload or output folders.
+    filename is only used to tell PDFs from images. With image_only, images
+    are embedded without OCR or decoding; optimize shrinks the page images
+    of OCR'd output. Multi-frame images get one page per frame. PDF pages
+    and frames are checked against cancel_token as they go.
+    
+    Returns:
+        (success, message, pdf_bytes)
+    """
+    timer = StageTimer()
+    if stats is not None:
+        stats['timings'] = timer.timings
+    
+    if Path(filename).suffix.lower() != '.pdf' and (image_only or not tesseract_available):
+        try:
+            with timer.stage('embed'):
+                pdf_bytes = embed_image_pdf(data)
+        except Exception as e:
+            return False, f"Invalid or corrupted image: {str(e)}", None
+        if stats is not None:
+            stats.update({'pages': 1, 'pages_ocr': 0, 'pages_passthrough': 1})
+        return True, image_only_message(), pdf_bytes
+    
+    frame_count = 1 if Path(filename).suffix.lower() == '.pdf' else count_frames(data)
+    if frame_count > 1:
+        try:
+            writer, fallback_count = ocr_frames(data, frame_count, page_workers, progress_callback, timer,
+                                                cancel_token)
+            output = BytesIO()
+            with timer.stage('write'):
+                writer.write(output)
+        except ConversionCancelled:
+            return False, CANCELLED_MESSAGE, None
+        except RuntimeError as e:
+            return False, str(e), None
+        except Exception as e:
+            return False, f"Error processing image: {str(e)}", None
+        pdf_bytes = output.getvalue()
+        if optimize:
+            pdf_bytes = optimize_output(pdf_bytes, timer, stats)
+        if stats is not None:
+            stats.update({'pages': frame_count, 'pages_ocr': frame_count - fallback_count,
+                          'pages_passthrough': 0, 'pages_fallback': fallback_count})
+        return True, frames_result_message(frame_count, fallback_count), pdf_bytes
+    
+    if Path(filename).suffix.lower() != '.pdf':
+        try:
+            with timer.stage('decode'):
+                img = open_image(data)
+        except Exception as e:
+            return False, f"Invalid or corrupted image: {str(e)}", None
+        try:
+            with img, timer.stage('ocr'):
+                result = image_to_searchable_pdf(img, data, cancel_token)
+            if result[0] and optimize:
+                result = (True, result[1], optimize_output(result[2], timer, stats))
+        except ConversionCancelled:
+            return False, CANCELLED_MESSAGE, None
+        except Exception as e:
+            return False, f"Error processing image: {str(e)}", None
+        if stats is not None and result[0]:
+            ocr_count = 0 if 'without ocr' in result[1].lower() else 1
+            stats.update({'pages': 1, 'pages_ocr': ocr_count, 'pages_passthrough': 1 - ocr_count})
+        return result
+    
+    if not tesseract_available:
+        return False, "Tesseract OCR not available - cannot process PDF", None
+    
+    if not PDF2IMAGE_AVAILABLE:
+        return False, "pdf2image library not installed", None
+    
+    try:
+        with timer.stage('decode'):
+            source = open_pdf_reader(BytesIO(data))
+            if source is not None:
+                page_count = len(source.pages)
+            else:
+                page_count = pdfinfo_from_bytes(data)["Pages"]
+        
+        if not page_count:
+            return False, "No pages found in PDF", None
+        
+        output = BytesIO()
+        try:
+            with rasterized_pages(data, page_workers or SCAN2PDF_PAGE_WORKERS, cancel_token) as rasterize:
+                ocr_count, fallback_count = ocr_pdf_pages(
+                    source, page_count, rasterize, output, page_workers, progress_callback, ocr_mode,
+                    timer, cancel_token)
+        except ConversionCancelled:
+            return False, CANCELLED_MESSAGE, None
+        except RuntimeError as e:
+            return False, str(e), None
+        pdf_bytes = output.getvalue()
+        if optimize:
+            pdf_bytes = optimize_output(pdf_bytes, timer, stats)
+        
+        if stats is not None:
+            stats.update({
+                'pages': page_count,
+                'pages_ocr': ocr_count,
+                'pages_passthrough': page_count - ocr_count - fallback_count,
+                'pages_fallback': fallback_count
+            })
+        return True, pdf_result_message(page_count, ocr_count, fallback_count), pdf_bytes
+    except Exception as e:
+        return False, f"Error processing PDF: {str(e)}", None
@@ -32,6 +32,7 @@ class MessageCode(str, Enum):
     VALIDATION_SUCCESS = "VALIDATION_SUCCESS"  # 200 OK
     CONVERSION_SUCCESS = "CONVERSION_SUCCESS"  # 200 OK
     CONVERSION_STARTED = "CONVERSION_STARTED"  # 202 Accepted - Async processing
+    CANCELLATION_REQUESTED = "CANCELLATION_REQUESTED"  # 202 Accepted - Conversion stopping
     FORMAT_SUCCESS = "FORMAT_SUCCESS"  # 200 OK
     MINIFY_SUCCESS = "MINIFY_SUCCESS"  # 200 OK
     FILE_UPLOAD_SUCCESS = "FILE_UPLOAD_SUCCESS"  # 201 Created
@@ -50,14 +51,22 @@ class MessageCode(str, Enum):
     MISSING_FILES = "MISSING_FILES"  # 400 Bad Request
     MISSING_OUTPUT_PATH = "MISSING_OUTPUT_PATH"  # 400 Bad Request
     FILE_NOT_FOUND = "FILE_NOT_FOUND"  # 404 Not Found
+    JOB_NOT_FOUND = "JOB_NOT_FOUND"  # 404 Not Found
+    RESULT_NOT_FOUND = "RESULT_NOT_FOUND"  # 404 Not Found
+    CONVERSION_NOT_FOUND = "CONVERSION_NOT_FOUND"  # 404 Not Found
     INVALID_FILE_TYPE = "INVALID_FILE_TYPE"  # 400 Bad Request
     FILE_TOO_LARGE = "FILE_TOO_LARGE"  # 413 Payload Too Large
+    TOO_MANY_FILES = "TOO_MANY_FILES"  # 400 Bad Request
     INVALID_COLOR = "INVALID_COLOR"  # 400 Bad Request - Invalid hex color
     INVALID_HEX_COLOR = "INVALID_HEX_COLOR"  # 400 Bad Request - Invalid hex color format
     NO_FOLDER_SELECTED = "NO_FOLDER_SELECTED"  # 400 Bad Request
     
     # Server error codes (5xx)
     OCR_NOT_AVAILABLE = "OCR_NOT_AVAILABLE"  # 503 Service Unavailable
+    SERVER_BUSY = "SERVER_BUSY"  # 503 Service Unavailable
+    SEARCH_NOT_AVAILABLE = "SEARCH_NOT_AVAILABLE"  # 503 Service Unavailable
+    PREVIEW_NOT_AVAILABLE = "PREVIEW_NOT_AVAILABLE"  # 503 Service Unavailable
+    RENDER_TIMEOUT = "RENDER_TIMEOUT"  # 504 Gateway Timeout
     INTERNAL_ERROR = "INTERNAL_ERROR"  # 500 Internal Server Error
     PROCESSING_ERROR = "PROCESSING_ERROR"  # 500 Internal Server Error
 
@@ -136,6 +145,11 @@ class MessageConfig:
             "http_status": status.HTTP_202_ACCEPTED,
             "toast_variant": "success",
         },
+        MessageCode.CANCELLATION_REQUESTED: {
+            "message": "Cancellation requested",
+            "http_status": status.HTTP_202_ACCEPTED,
+            "toast_variant": "success",
+        },
         
         # Error messages
         MessageCode.VALIDATION_ERROR: {
@@ -183,6 +197,21 @@ class MessageConfig:
             "http_status": status.HTTP_404_NOT_FOUND,
             "toast_variant": "destructive",
         },
+        MessageCode.JOB_NOT_FOUND: {
+            "message": "Conversion job not found: {job_id}",
+            "http_status": status.HTTP_404_NOT_FOUND,
+            "toast_variant": "destructive",
+        },
+        MessageCode.RESULT_NOT_FOUND: {
+            "message": "Conversion result not found: {result_id}",
+            "http_status": status.HTTP_404_NOT_FOUND,
+            "toast_variant": "destructive",
+        },
+        MessageCode.CONVERSION_NOT_FOUND: {
+            "message": "No running conversion: {conversion_id}",
+            "http_status": status.HTTP_404_NOT_FOUND,
+            "toast_variant": "destructive",
+        },
         MessageCode.INVALID_FILE_TYPE: {
             "message": "Invalid file type: {file_type}",
             "http_status": status.HTTP_400_BAD_REQUEST,
@@ -193,6 +222,11 @@ class MessageConfig:
             "http_status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             "toast_variant": "destructive",
         },
+        MessageCode.TOO_MANY_FILES: {
+            "message": "Too many files. Maximum per request: {max_files}",
+            "http_status": status.HTTP_400_BAD_REQUEST,
+            "toast_variant": "destructive",
+        },
         MessageCode.INVALID_COLOR: {
             "message": "Invalid color: {color}",
             "http_status": status.HTTP_400_BAD_REQUEST,
@@ -213,6 +247,26 @@ class MessageConfig:
             "http_status": status.HTTP_503_SERVICE_UNAVAILABLE,
             "toast_variant": "destructive",
         },
+        MessageCode.SERVER_BUSY: {
+            "message": "Server is busy. Please retry in {retry_after} seconds",
+            "http_status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "toast_variant": "destructive",
+        },
+        MessageCode.SEARCH_NOT_AVAILABLE: {
+            "message": "Search index is disabled",
+            "http_status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "toast_variant": "destructive",
+        },
+        MessageCode.PREVIEW_NOT_AVAILABLE: {
+            "message": "Page previews require pdf2image and Poppler",
+            "http_status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "toast_variant": "destructive",
+        },
+        MessageCode.RENDER_TIMEOUT: {
+            "message": "Rendering timed out after {timeout} seconds",
+            "http_status": status.HTTP_504_GATEWAY_TIMEOUT,
+            "toast_variant": "destructive",
+        },
         MessageCode.INTERNAL_ERROR: {
             "message": "Internal server error: {error}",
             "http_status": status.HTTP_500_INTERNAL_SERVER_ERROR,
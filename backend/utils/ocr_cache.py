@@ -0,0 +1,217 @@
+"""
+OCR Result Cache
+Content-addressed on-disk cache of searchable PDFs with LRU eviction
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from backend.config import (
+    SCAN2PDF_CACHE_ENABLED, SCAN2PDF_CACHE_DIR, SCAN2PDF_CACHE_MAX_SIZE,
+    SCAN2PDF_CACHE_USE_HARDLINKS
+)
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path, params: Optional[Dict[str, Any]] = None) -> str:
+    """Hash a file's bytes together with the parameters used to process it"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    if params:
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FileCache:
+    """
+    Size-bounded on-disk cache of files with LRU eviction
+
+    Entries are stored as `<cache_dir>/<key[:2]>/<key><suffix>`. Recency is
+    tracked through the entry mtime, which subclasses refresh on every hit,
+    so LRU order survives restarts.
+    """
+
+    name = 'File'
+    suffix = ''
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU index from the cache directory"""
+        entries = []
+        for path in self.cache_dir.glob(f'*/*{self.suffix}'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        logger.info(f"{self.name} cache loaded: {len(self._entries)} entries, {self._size} bytes")
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def _add(self, key: str, size: int):
+        """Account for a stored entry and evict old ones (call with the lock held)"""
+        self._drop(key)
+        self._entries[key] = size
+        self._size += size
+        self._evict()
+
+    def _drop(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    def _evict(self):
+        while self._size > self.max_size and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                self._entry_path(key).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for the status endpoint"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_size_bytes': self.max_size
+            }
+
+
+class OCRCache(FileCache):
+    """Cache of searchable PDFs keyed on input content and OCR parameters"""
+
+    name = 'OCR'
+    suffix = '.pdf'
+
+    def __init__(self, cache_dir: Path, max_size: int, use_hardlinks: bool = True):
+        self.use_hardlinks = use_hardlinks
+        self.hits = 0
+        self.misses = 0
+        super().__init__(cache_dir, max_size)
+
+    def make_key(self, input_path, params: Dict[str, Any]) -> str:
+        """Build the cache key for an input file and OCR parameters"""
+        return hash_file(input_path, params)
+
+    def get(self, key: str, output_path) -> bool:
+        """
+        Materialize a cached PDF at output_path
+
+        Returns:
+            True on a cache hit, False on a miss
+        """
+        entry = self._entry_path(key)
+        with self._lock:
+            if key not in self._entries or not entry.exists():
+                self._drop(key)
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        output_path = Path(output_path)
+        try:
+            if output_path.exists():
+                output_path.unlink()
+            if self.use_hardlinks:
+                try:
+                    os.link(entry, output_path)
+                except OSError:
+                    shutil.copyfile(entry, output_path)
+            else:
+                shutil.copyfile(entry, output_path)
+            os.utime(entry)
+        except OSError as e:
+            logger.warning(f"Failed to restore OCR cache entry {key}: {str(e)}")
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return False
+        return True
+
+    def put(self, key: str, pdf_path):
+        """Store a freshly created searchable PDF and evict old entries"""
+        entry = self._entry_path(key)
+        entry.parent.mkdir(exist_ok=True)
+        tmp_path = entry.with_suffix(f'.{threading.get_ident()}.tmp')
+        try:
+            shutil.copyfile(pdf_path, tmp_path)
+            os.replace(tmp_path, entry)
+        except OSError as e:
+            logger.warning(f"Failed to store OCR cache entry {key}: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        size = entry.stat().st_size
+        with self._lock:
+            self._add(key, size)
+
+    @staticmethod
+    def detach(output_path):
+        """
+        Unlink an output that is hard-linked to a cache entry
+
+        Converters truncate and rewrite their output in place, which would
+        otherwise corrupt the shared cache entry.
+        """
+        output_path = Path(output_path)
+        try:
+            if output_path.stat().st_nlink > 1:
+                output_path.unlink()
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for the status endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+        return {**counters, **super().stats()}
+
+
+_ocr_cache: Optional[OCRCache] = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Get the shared OCR cache, or None if caching is disabled"""
+    global _ocr_cache
+    if not SCAN2PDF_CACHE_ENABLED:
+        return None
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            _ocr_cache = OCRCache(SCAN2PDF_CACHE_DIR, SCAN2PDF_CACHE_MAX_SIZE, SCAN2PDF_CACHE_USE_HARDLINKS)
+    return _ocr_cache
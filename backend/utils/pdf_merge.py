@@ -0,0 +1,173 @@
+"""
+Streaming PDF Merge
+Appends PDFs to an output file one document at a time
+"""
+
+import os
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject,
+    NumberObject, StreamObject
+)
+
+PAGES_OBJECT = 1
+CATALOG_OBJECT = 2
+
+
+class StreamingPdfMerger:
+    """
+    Incremental PDF writer for combining many documents
+
+    Unlike PdfWriter, which keeps every page of every document in memory
+    until write(), each appended document is serialized straight to the
+    output stream and its reader released. Only object offsets and page
+    references are kept, so memory stays flat no matter how many pages are
+    combined.
+
+    References from a page to other pages or page-tree nodes (link
+    destinations, annotation /P entries) are replaced with null, since those
+    pages are not part of the page tree being written.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.offsets = {}
+        self.kids = []
+        self._next_number = CATALOG_OBJECT + 1
+        self.stream.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self.kids)
+
+    def _allocate(self) -> int:
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def append(self, pdf_path, pages=None) -> int:
+        """
+        Append the pages of a PDF to the output
+
+        pdf_path may also be a binary stream or an open PdfReader. pages
+        limits the append to those 0-based page indexes, in the given order.
+
+        Returns:
+            Number of pages appended
+        """
+        if isinstance(pdf_path, PdfReader):
+            reader = pdf_path
+        else:
+            reader = PdfReader(pdf_path if hasattr(pdf_path, 'read') else str(pdf_path))
+            if reader.is_encrypted:
+                reader.decrypt('')
+
+        memo = {}
+        pending = []
+        appended = 0
+        for page in (reader.pages if pages is None else (reader.pages[i] for i in pages)):
+            number = self._allocate()
+            page_dict = DictionaryObject()
+            for key, value in page.items():
+                if key != '/Parent':
+                    page_dict[NameObject(key)] = self._clone(value, memo, pending)
+            page_dict[NameObject('/Parent')] = IndirectObject(PAGES_OBJECT, 0, None)
+            self._write_object(number, page_dict)
+            self.kids.append(IndirectObject(number, 0, None))
+            appended += 1
+
+            # Shared resources (fonts, images) are written once per document
+            while pending:
+                target_number, target = pending.pop()
+                self._write_object(target_number, self._clone_direct(target, memo, pending))
+        return appended
+
+    def _clone(self, obj, memo, pending):
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in memo:
+                target = obj.get_object()
+                if isinstance(target, DictionaryObject) and target.get('/Type') in ('/Page', '/Pages'):
+                    return NullObject()
+                memo[key] = self._allocate()
+                pending.append((memo[key], target))
+            return IndirectObject(memo[key], 0, None)
+        return self._clone_direct(obj, memo, pending)
+
+    def _clone_direct(self, obj, memo, pending):
+        if isinstance(obj, StreamObject):
+            clone = obj.__class__()
+            clone._data = obj._data
+            for key, value in obj.items():
+                clone[NameObject(key)] = self._clone(value, memo, pending)
+            return clone
+        if isinstance(obj, DictionaryObject):
+            clone = DictionaryObject()
+            for key, value in obj.items():
+                clone[NameObject(key)] = self._clone(value, memo, pending)
+            return clone
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._clone(item, memo, pending) for item in obj)
+        return obj
+
+    def _write_object(self, number: int, obj):
+        self.offsets[number] = self.stream.tell()
+        self.stream.write(f"{number} 0 obj\n".encode('ascii'))
+        obj.write_to_stream(self.stream, None)
+        self.stream.write(b"\nendobj\n")
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer"""
+        pages = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(self.kids),
+            NameObject('/Count'): NumberObject(len(self.kids))
+        })
+        self._write_object(PAGES_OBJECT, pages)
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(PAGES_OBJECT, 0, None)
+        })
+        self._write_object(CATALOG_OBJECT, catalog)
+
+        size = self._next_number
+        xref_offset = self.stream.tell()
+        self.stream.write(f"xref\n0 {size}\n".encode('ascii'))
+        self.stream.write(b"0000000000 65535 f \n")
+        for number in range(1, size):
+            self.stream.write(f"{self.offsets[number]:010d} 00000 n \n".encode('ascii'))
+        self.stream.write(
+            f"trailer\n<< /Size {size} /Root {CATALOG_OBJECT} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n".encode('ascii')
+        )
+
+
+def merge_pdfs(pdf_paths, output_path, progress_callback=None) -> int:
+    """
+    Combine PDFs in the given order into output_path
+
+    The output is written to a temporary file and moved into place once
+    complete. progress_callback(done, total, path) is called after each
+    document is appended.
+
+    Returns:
+        Total number of pages written
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.part')
+    total = len(pdf_paths)
+    try:
+        with open(tmp_path, 'wb') as f:
+            merger = StreamingPdfMerger(f)
+            for done, pdf_path in enumerate(pdf_paths, start=1):
+                merger.append(pdf_path)
+                if progress_callback:
+                    progress_callback(done, total, pdf_path)
+            merger.close()
+        os.replace(tmp_path, output_path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return merger.page_count
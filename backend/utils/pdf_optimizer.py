@@ -0,0 +1,211 @@
+"""
+PDF Output Optimizer
+Shrinks the page images of OCR'd PDFs: bitonal/grayscale detection,
+downsampling to a target DPI and JPEG recompression
+"""
+
+import os
+import zlib
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from PIL import Image, ImageChops
+
+from backend.config import (
+    SCAN2PDF_OPTIMIZE_DPI, SCAN2PDF_OPTIMIZE_JPEG_QUALITY, SCAN2PDF_OPTIMIZE_DETECT_COLOR
+)
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Optional: pikepdf rewrites image streams in place without touching page content
+try:
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+
+# Channel difference above which a pixel counts as coloured
+GRAY_TOLERANCE = 24
+# Share of coloured pixels an image may have and still be stored as grayscale
+GRAY_MAX_COLORED = 0.001
+# Gray levels this close to black or white count as ink or paper
+BITONAL_MARGIN = 48
+# Share of mid-gray pixels an image may have and still be stored as bitonal
+BITONAL_MAX_MIDTONES = 0.01
+# Only downsample images at least this much above the target DPI
+DOWNSAMPLE_THRESHOLD = 1.1
+
+BITONAL_TABLE = [0] * 128 + [255] * 128
+
+
+def get_optimize_params() -> Dict[str, Any]:
+    """Get the settings that determine the content of an optimized PDF"""
+    return {
+        'dpi': SCAN2PDF_OPTIMIZE_DPI,
+        'jpeg_quality': SCAN2PDF_OPTIMIZE_JPEG_QUALITY,
+        'detect_color': SCAN2PDF_OPTIMIZE_DETECT_COLOR
+    }
+
+
+def reduce_colors(img: Image.Image) -> Image.Image:
+    """
+    Convert an image to the smallest colour class that holds its content
+
+    Scans of black-and-white documents become 1-bit, other images without
+    real colour become 8-bit grayscale.
+    """
+    if img.mode == 'RGB':
+        r, g, b = img.split()
+        spread = ImageChops.lighter(ImageChops.difference(r, g), ImageChops.difference(g, b))
+        colored = sum(spread.histogram()[GRAY_TOLERANCE:])
+        if colored > img.width * img.height * GRAY_MAX_COLORED:
+            return img
+        img = img.convert('L')
+
+    if img.mode == 'L':
+        histogram = img.histogram()
+        midtones = sum(histogram[BITONAL_MARGIN:256 - BITONAL_MARGIN])
+        if midtones <= img.width * img.height * BITONAL_MAX_MIDTONES:
+            return img.point(BITONAL_TABLE, '1')
+    return img
+
+
+def downsample(img: Image.Image, dpi: float, target_dpi: int) -> Image.Image:
+    """Scale an image down to target_dpi, keeping bitonal images bitonal"""
+    if not target_dpi or dpi <= target_dpi * DOWNSAMPLE_THRESHOLD:
+        return img
+    scale = target_dpi / dpi
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if img.mode == '1':
+        return img.convert('L').resize(size, Image.LANCZOS).point(BITONAL_TABLE, '1')
+    return img.resize(size, Image.LANCZOS)
+
+
+def encode_image(img: Image.Image, jpeg_quality: int) -> Tuple[bytes, Any, Any, int]:
+    """
+    Encode an image as PDF image stream data
+
+    Returns:
+        (data, filter, colour space, bits per component)
+    """
+    if img.mode == '1':
+        # PIL packs 1-bit rows MSB first with 1 = white, as DeviceGray expects
+        return (zlib.compress(img.tobytes(), 9), pikepdf.Name.FlateDecode,
+                pikepdf.Name.DeviceGray, 1)
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=jpeg_quality, optimize=True)
+    colorspace = pikepdf.Name.DeviceGray if img.mode == 'L' else pikepdf.Name.DeviceRGB
+    return buffer.getvalue(), pikepdf.Name.DCTDecode, colorspace, 8
+
+
+def optimize_image(xobject, page_width_inches: float, params: Dict[str, Any]) -> bool:
+    """
+    Re-encode one image XObject if that makes it smaller
+
+    Only the stream and its dictionary change. The page content still
+    draws the image over the same area, so the OCR text layer, which is
+    positioned in page space, stays aligned with it.
+
+    Returns:
+        True if the image was replaced
+    """
+    if '/SMask' in xobject or '/Mask' in xobject or '/Decode' in xobject or xobject.get('/ImageMask', False):
+        return False
+    try:
+        img = pikepdf.PdfImage(xobject).as_pil_image()
+    except Exception:
+        return False
+    if img.mode == 'P':
+        img = img.convert('RGB')
+    elif img.mode not in ('1', 'L', 'RGB'):
+        return False
+
+    if params['detect_color']:
+        img = reduce_colors(img)
+    # Tesseract and img2pdf draw the image over the whole page width
+    img = downsample(img, img.width / page_width_inches, params['dpi'])
+    data, image_filter, colorspace, bits = encode_image(img, params['jpeg_quality'])
+
+    if len(data) >= len(xobject.read_raw_bytes()):
+        return False
+    xobject.write(data, filter=image_filter)
+    xobject.Width = img.width
+    xobject.Height = img.height
+    xobject.ColorSpace = colorspace
+    xobject.BitsPerComponent = bits
+    if '/DecodeParms' in xobject:
+        del xobject['/DecodeParms']
+    return True
+
+
+def optimize_document(pdf, params: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Optimize every page image of an open pikepdf document
+
+    Returns:
+        Number of images replaced
+    """
+    params = params or get_optimize_params()
+    seen = set()
+    optimized = 0
+    for page in pdf.pages:
+        mediabox = [float(v) for v in page.mediabox]
+        page_width_inches = (mediabox[2] - mediabox[0]) / 72
+        resources = page.obj.get('/Resources')
+        xobjects = resources.get('/XObject') if resources is not None else None
+        if xobjects is None or page_width_inches <= 0:
+            continue
+        for name in list(xobjects.keys()):
+            xobject = xobjects[name]
+            if xobject.get('/Subtype') != '/Image' or xobject.objgen in seen:
+                continue
+            seen.add(xobject.objgen)
+            if optimize_image(xobject, page_width_inches, params):
+                optimized += 1
+    return optimized
+
+
+def optimize_pdf_bytes(data: bytes, params: Optional[Dict[str, Any]] = None) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Optimize an in-memory PDF
+
+    Returns:
+        (pdf_bytes, stats with size_before, size_after and images)
+    """
+    with pikepdf.open(BytesIO(data)) as pdf:
+        optimized = optimize_document(pdf, params)
+        output = BytesIO()
+        pdf.save(output, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    result = output.getvalue()
+    if len(result) >= len(data):
+        result = data
+    return result, {'size_before': len(data), 'size_after': len(result), 'images': optimized}
+
+
+def optimize_pdf_file(pdf_path, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Optimize a PDF file in place
+
+    The optimized copy is written next to the file and only replaces it if
+    it is smaller, as optimize_pdf_bytes does.
+
+    Returns:
+        Stats with size_before, size_after and images
+    """
+    pdf_path = Path(pdf_path)
+    size_before = pdf_path.stat().st_size
+    tmp_path = pdf_path.with_name(pdf_path.name + '.optimized')
+    try:
+        with pikepdf.open(pdf_path) as pdf:
+            optimized = optimize_document(pdf, params)
+            if optimized:
+                pdf.save(tmp_path, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+        if optimized and tmp_path.stat().st_size < size_before:
+            os.replace(tmp_path, pdf_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    size_after = pdf_path.stat().st_size
+    logger.debug(f"Optimized {pdf_path.name}: {size_before} -> {size_after} bytes, {optimized} image(s)")
+    return {'size_before': size_before, 'size_after': size_after, 'images': optimized}
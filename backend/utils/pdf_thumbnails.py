@@ -0,0 +1,113 @@
+"""
+PDF Page Thumbnails
+On-disk cache of low-DPI page renders keyed on PDF path and mtime, with LRU eviction
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from backend.config import (
+    SCAN2PDF_THUMBNAIL_DIR, SCAN2PDF_THUMBNAIL_DPI, SCAN2PDF_THUMBNAIL_CACHE_MAX_SIZE
+)
+from backend.utils.ocr_cache import FileCache
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Optional: pdf2image renders pages through Poppler's pdftoppm
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+
+THUMBNAIL_JPEG_QUALITY = 80
+# Largest DPI a client may ask for, so a thumbnail cannot turn into a full-size render
+THUMBNAIL_MAX_DPI = 150
+
+
+class PageOutOfRange(ValueError):
+    """Raised when a thumbnail is requested for a page the PDF does not have"""
+
+
+class ThumbnailCache(FileCache):
+    """
+    Cache of rendered PDF pages
+
+    The key covers the PDF's resolved path, size and mtime, so rewriting the
+    PDF makes its old thumbnails unreachable; they age out through LRU
+    eviction.
+    """
+
+    name = 'Thumbnail'
+    suffix = '.jpg'
+
+    @staticmethod
+    def make_key(pdf_path: Path, page: int, dpi: int) -> str:
+        """Build the cache key for a page of a PDF as it is on disk now"""
+        stat = pdf_path.stat()
+        identity = f"{pdf_path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0{page}\0{dpi}"
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def get_thumbnail(self, pdf_path, page: int = 1, dpi: Optional[int] = None) -> Path:
+        """
+        Get the path of a JPEG thumbnail for a 1-based page, rendering it on a miss
+
+        Raises:
+            PageOutOfRange: If the PDF has fewer pages
+            OSError: If the PDF cannot be read
+        """
+        pdf_path = Path(pdf_path)
+        dpi = min(dpi or SCAN2PDF_THUMBNAIL_DPI, THUMBNAIL_MAX_DPI)
+        key = self.make_key(pdf_path, page, dpi)
+        entry = self._entry_path(key)
+        with self._lock:
+            hit = key in self._entries and entry.exists()
+            if hit:
+                self._entries.move_to_end(key)
+        if hit:
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+            return entry
+
+        self._render(pdf_path, page, dpi, entry)
+        size = entry.stat().st_size
+        with self._lock:
+            self._add(key, size)
+        return entry
+
+    @staticmethod
+    def _render(pdf_path: Path, page: int, dpi: int, entry: Path):
+        """Render one page to entry, writing through a temporary file"""
+        page_count = pdfinfo_from_path(str(pdf_path))["Pages"]
+        if page > page_count:
+            raise PageOutOfRange(f"Page {page} out of range, PDF has {page_count} page(s)")
+        images = convert_from_path(str(pdf_path), dpi=dpi, first_page=page, last_page=page)
+        entry.parent.mkdir(exist_ok=True)
+        tmp_path = entry.with_suffix(f'.{threading.get_ident()}.tmp')
+        try:
+            with images[0] as img:
+                img.convert('RGB').save(tmp_path, format='JPEG', quality=THUMBNAIL_JPEG_QUALITY)
+            os.replace(tmp_path, entry)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> Optional[ThumbnailCache]:
+    """Get the shared thumbnail cache, or None if pdf2image is not installed"""
+    global _thumbnail_cache
+    if not PDF2IMAGE_AVAILABLE:
+        return None
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache(SCAN2PDF_THUMBNAIL_DIR, SCAN2PDF_THUMBNAIL_CACHE_MAX_SIZE)
+    return _thumbnail_cache
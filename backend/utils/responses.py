@@ -88,6 +88,7 @@ def api_success_response(
 def api_error_response(
     message_code: MessageCode, 
     error: Optional[str] = None, 
+    headers: Optional[Dict[str, str]] = None,
     **kwargs
 ) -> HTTPException:
     """
@@ -99,6 +100,7 @@ def api_error_response(
     Args:
         message_code: MessageCode enum value
         error: Optional detailed error message (added to response)
+        headers: Optional response headers (e.g. Retry-After)
         **kwargs: Format parameters for message text
     
     Returns:
@@ -114,5 +116,5 @@ def api_error_response(
     if error:
         response_dict["error"] = error
     http_status = MessageConfig.get_http_status(message_code)
-    raise HTTPException(status_code=http_status, detail=response_dict)
+    raise HTTPException(status_code=http_status, detail=response_dict, headers=headers)
 
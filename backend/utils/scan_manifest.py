@@ -0,0 +1,164 @@
+"""
+Scan2PDF Directory Manifest
+Per input/output folder record of converted files, so repeated directory
+runs only convert files that are new or have changed
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, List, Iterator, Tuple, Set
+
+from backend.config import SCAN2PDF_MANIFEST_DIR
+from backend.utils.ocr_cache import hash_file
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# File statuses that mean the source does not need converting again
+DONE_STATUSES = ('success', 'skipped')
+
+
+def iter_directory(input_dir: Path, extensions, recursive: bool = False) -> Iterator[os.DirEntry]:
+    """
+    Yield files under input_dir with a supported extension
+
+    os.scandir entries carry their stat result from the directory listing
+    on Windows, which saves a round trip per file on network shares.
+    """
+    pending = [Path(input_dir)]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(Path(entry.path))
+                elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions:
+                    yield entry
+
+
+class ScanManifest:
+    """
+    SQLite manifest of the sources converted from one input folder into one output folder
+
+    Each row holds a source file's size, mtime and SHA-256 along with the
+    output it produced and its status. A source whose size and mtime match a
+    done row is skipped without touching the output folder; if only the
+    mtime moved, the content hash decides.
+    """
+
+    def __init__(self, db_path: Path, input_dir: Path):
+        self.db_path = Path(db_path)
+        self.input_dir = Path(input_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT,"
+                " output TEXT, status TEXT, updated_at REAL)"
+            )
+
+    @classmethod
+    def for_folders(cls, input_dir, output_dir, manifest_dir: Path = SCAN2PDF_MANIFEST_DIR) -> 'ScanManifest':
+        """Open the manifest for an input/output folder pair"""
+        pair = f"{Path(input_dir).resolve()}|{Path(output_dir).resolve()}"
+        name = hashlib.sha256(pair.encode('utf-8')).hexdigest()[:32]
+        return cls(Path(manifest_dir) / f"{name}.sqlite3", input_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _key(self, file_path) -> str:
+        return Path(file_path).relative_to(self.input_dir).as_posix()
+
+    def partition(
+        self,
+        entries: List[os.DirEntry],
+        retry_failed: bool = True,
+        recursive: bool = True
+    ) -> Tuple[List[Path], List[Path]]:
+        """
+        Split scanned files into those that need converting and those that don't
+
+        Rows for sources that no longer exist are dropped; without recursive
+        the scan did not look into subfolders, so their rows are kept.
+        Without retry_failed, a source that failed to convert is only tried
+        again once its size or mtime changes (it is in neither list until then).
+
+        Returns:
+            (changed source paths, outputs of unchanged sources)
+        """
+        with closing(self._connect()) as conn:
+            rows = {row[0]: row[1:] for row in conn.execute(
+                "SELECT path, size, mtime_ns, sha256, output, status FROM files")}
+
+        changed: List[Path] = []
+        unchanged: List[Path] = []
+        touched = []
+        for entry in entries:
+            file_path = Path(entry.path)
+            key = self._key(file_path)
+            row = rows.pop(key, None)
+            if row is None:
+                changed.append(file_path)
+                continue
+            size, mtime_ns, sha256, output, status = row
+            if status not in DONE_STATUSES:
+                stat = entry.stat()
+                if retry_failed or (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    changed.append(file_path)
+                continue
+            stat = entry.stat()
+            if stat.st_size != size:
+                changed.append(file_path)
+                continue
+            if stat.st_mtime_ns != mtime_ns:
+                # Copied or touched files keep their content; only re-OCR real edits
+                try:
+                    same = sha256 and hash_file(file_path) == sha256
+                except OSError:
+                    same = False
+                if not same:
+                    changed.append(file_path)
+                    continue
+                touched.append((stat.st_mtime_ns, time.time(), key))
+            unchanged.append(Path(output))
+
+        removed = [key for key in rows if recursive or '/' not in key]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("UPDATE files SET mtime_ns = ?, updated_at = ? WHERE path = ?", touched)
+            conn.executemany("DELETE FROM files WHERE path = ?", [(key,) for key in removed])
+        # Watch folders re-scan every few seconds, so idle scans stay out of the info log
+        log = logger.info if changed or removed else logger.debug
+        log(f"Manifest {self.db_path.name}: {len(changed)} new or changed, "
+            f"{len(unchanged)} unchanged, {len(removed)} removed")
+        return changed, unchanged
+
+    def recorded(self, file_paths: List[Path]) -> Set[Path]:
+        """Get the given sources that already have a row"""
+        with closing(self._connect()) as conn:
+            keys = {row[0] for row in conn.execute("SELECT path FROM files")}
+        return {Path(p) for p in file_paths if self._key(p) in keys}
+
+    def record(self, file_path, pdf_path, status: str):
+        """Store a conversion outcome for a source file"""
+        file_path = Path(file_path)
+        try:
+            stat = file_path.stat()
+            sha256: Optional[str] = hash_file(file_path)
+        except OSError as e:
+            logger.warning(f"Failed to record {file_path.name} in manifest: {str(e)}")
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, output, status, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key(file_path), stat.st_size, stat.st_mtime_ns, sha256, str(pdf_path), status,
+                 time.time())
+            )
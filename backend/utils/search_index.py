@@ -0,0 +1,181 @@
+"""
+OCR Text Search Index
+On-disk full-text index over the text layer of searchable PDFs
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from PyPDF2 import PdfReader
+
+from backend.config import SCAN2PDF_SEARCH_INDEX_ENABLED, SCAN2PDF_SEARCH_INDEX_PATH
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SNIPPET_TOKENS = 12
+
+
+def extract_page_texts(pdf_path) -> List[str]:
+    """Get the text layer of every page of a PDF"""
+    reader = PdfReader(str(pdf_path))
+    if reader.is_encrypted:
+        reader.decrypt('')
+    texts = []
+    for page in reader.pages:
+        try:
+            texts.append(page.extract_text() or '')
+        except Exception:
+            texts.append('')
+    return texts
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every term
+
+    Each whitespace-separated term is quoted, so punctuation in invoice
+    numbers and the like is matched as a phrase instead of parsed as syntax.
+    """
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms if term)
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 inverted index of PDF text, one row per page
+
+    Documents are keyed on their path and re-indexed only when their size or
+    mtime changes, so indexing a converted file (or a whole folder) again is
+    cheap.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " id INTEGER PRIMARY KEY, path TEXT UNIQUE, source TEXT, size INTEGER,"
+                " mtime_ns INTEGER, page_count INTEGER, indexed_at REAL)"
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5("
+                " text, document_id UNINDEXED, page UNINDEXED,"
+                " tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def index_pdf(self, pdf_path, source_path=None) -> bool:
+        """
+        Add or refresh a PDF in the index
+
+        Returns:
+            True if the document was (re)indexed, False if it was up to date
+        """
+        pdf_path = Path(pdf_path).resolve()
+        stat = pdf_path.stat()
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT size, mtime_ns FROM documents WHERE path = ?",
+                               (str(pdf_path),)).fetchone()
+        if row == (stat.st_size, stat.st_mtime_ns):
+            return False
+
+        texts = extract_page_texts(pdf_path)
+        with self._lock, closing(self._connect()) as conn, conn:
+            self._delete(conn, str(pdf_path))
+            cursor = conn.execute(
+                "INSERT INTO documents (path, source, size, mtime_ns, page_count, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (str(pdf_path), str(source_path) if source_path else None, stat.st_size,
+                 stat.st_mtime_ns, len(texts), time.time())
+            )
+            conn.executemany(
+                "INSERT INTO pages (text, document_id, page) VALUES (?, ?, ?)",
+                [(text, cursor.lastrowid, number) for number, text in enumerate(texts, start=1)
+                 if text.strip()]
+            )
+        return True
+
+    def index_folder(self, folder, recursive: bool = False) -> Dict[str, int]:
+        """
+        Index every PDF in a folder and drop documents that no longer exist there
+
+        Returns:
+            Counts of indexed, unchanged, failed and removed documents
+        """
+        folder = Path(folder).resolve()
+        pattern = '**/*.pdf' if recursive else '*.pdf'
+        counts = {'indexed': 0, 'unchanged': 0, 'failed': 0, 'removed': 0}
+        for pdf_path in folder.glob(pattern):
+            try:
+                counts['indexed' if self.index_pdf(pdf_path) else 'unchanged'] += 1
+            except Exception as e:
+                logger.warning(f"Failed to index {pdf_path.name}: {str(e)}")
+                counts['failed'] += 1
+
+        prefix = str(folder) + os.sep
+        with self._lock, closing(self._connect()) as conn, conn:
+            for (path,) in conn.execute("SELECT path FROM documents WHERE substr(path, 1, ?) = ?",
+                                        (len(prefix), prefix)).fetchall():
+                if not Path(path).exists():
+                    self._delete(conn, path)
+                    counts['removed'] += 1
+        return counts
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, path: str):
+        row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM pages WHERE document_id = ?", row)
+            conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Find pages matching every term of query, best matches first"""
+        match = build_match_query(query)
+        if not match:
+            return []
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT d.path, d.source, p.page,"
+                " snippet(pages, 0, '<mark>', '</mark>', '…', ?), bm25(pages)"
+                " FROM pages p JOIN documents d ON d.id = p.document_id"
+                " WHERE pages MATCH ? ORDER BY bm25(pages) LIMIT ? OFFSET ?",
+                (SNIPPET_TOKENS, match, limit, offset)
+            ).fetchall()
+        return [{'path': path, 'source': source, 'page': page, 'snippet': snippet,
+                 'score': round(-rank, 4)}
+                for path, source, page, snippet, rank in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index counters for the status endpoint"""
+        with closing(self._connect()) as conn:
+            documents, pages = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(page_count), 0) FROM documents").fetchone()
+        return {'documents': documents, 'pages': pages}
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """Get the shared search index, or None if indexing is disabled"""
+    global _search_index
+    if not SCAN2PDF_SEARCH_INDEX_ENABLED:
+        return None
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(SCAN2PDF_SEARCH_INDEX_PATH)
+    return _search_index
@@ -0,0 +1,271 @@
+"""
+Streaming Multipart Uploads
+Receives multipart request bodies chunk by chunk, writing files to disk and
+hashing them as they arrive instead of buffering whole files in memory
+"""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from werkzeug.utils import secure_filename
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from backend.config import MAX_CONTENT_LENGTH, MAX_FILE_SIZE, MAX_FILES_PER_REQUEST
+from backend.utils.responses import api_error_response
+from backend.utils.messages import MessageCode
+from backend.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# mkstemp creates files readable by their owner only; kept uploads get the usual
+# mode for new files instead. os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+@dataclass
+class StoredUpload:
+    """A received file and its content hash"""
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    path: Optional[Path] = None
+    data: Optional[bytes] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.filename,
+            'path': str(self.path) if self.path else None,
+            'size': self.size,
+            'sha256': self.sha256
+        }
+
+
+def format_size(size: int) -> str:
+    return f"{size // (1024 * 1024)}MB"
+
+
+class _UploadReceiver:
+    """
+    python-multipart callbacks for one request
+
+    Parser callbacks only queue work; file writes happen in flush() on a
+    worker thread, once per network chunk. Files are received into .part
+    files and only given their final names by commit(), once the whole
+    body has arrived.
+    """
+
+    def __init__(self, field_name: str, dest_dir: Optional[Path], in_memory: bool,
+                 max_file_size: int, max_files: int):
+        self.field_name = field_name
+        self.dest_dir = dest_dir
+        self.in_memory = in_memory
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.uploads: List[StoredUpload] = []
+        self._pending: List[tuple] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._part: Optional[Dict[str, Any]] = None
+        self._open_parts: List[Dict[str, Any]] = []
+        # Files this request created, which abort() removes
+        self._created: List[Path] = []
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+            'on_part_data': self.on_part_data,
+            'on_part_end': self.on_part_end
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._part = None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        name = options.get(b'name', b'').decode('latin-1')
+        filename = options.get(b'filename')
+        # Plain form fields, other file fields and empty file inputs are skipped
+        if name != self.field_name or not filename:
+            return
+
+        if len(self.uploads) + len(self._open_parts) >= self.max_files:
+            raise api_error_response(MessageCode.TOO_MANY_FILES, max_files=self.max_files)
+
+        self._part = {
+            'filename': filename.decode('utf-8', errors='replace'),
+            'content_type': self._headers.get(b'content-type', b'').decode('latin-1'),
+            'size': 0,
+            'digest': hashlib.sha256(),
+            'buffer': bytearray() if self.in_memory else None,
+            'file': None,
+            'tmp_path': None
+        }
+        self._open_parts.append(self._part)
+        self._pending.append(('open', self._part))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._part is None:
+            return
+        chunk = data[start:end]
+        self._part['size'] += len(chunk)
+        if self._part['size'] > self.max_file_size:
+            raise api_error_response(MessageCode.FILE_TOO_LARGE, max_size=format_size(self.max_file_size))
+        self._part['digest'].update(chunk)
+        if self.in_memory:
+            self._part['buffer'] += chunk
+        else:
+            self._pending.append(('write', self._part, chunk))
+
+    def on_part_end(self):
+        if self._part is not None:
+            self._pending.append(('close', self._part))
+        self._part = None
+
+    def flush(self):
+        """Apply queued file operations (runs on a worker thread)"""
+        pending, self._pending = self._pending, []
+        for action, part, *args in pending:
+            if action == 'open':
+                if not self.in_memory:
+                    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=self.dest_dir)
+                    part['file'] = os.fdopen(fd, 'wb')
+                    part['tmp_path'] = Path(tmp_path)
+                    self._created.append(part['tmp_path'])
+            elif action == 'write':
+                part['file'].write(args[0])
+            elif action == 'close':
+                self._finish(part)
+
+    def _finish(self, part: Dict[str, Any]):
+        self._open_parts.remove(part)
+        upload = StoredUpload(
+            filename=part['filename'],
+            content_type=part['content_type'],
+            size=part['size'],
+            sha256=part['digest'].hexdigest()
+        )
+        if self.in_memory:
+            upload.data = bytes(part['buffer'])
+        else:
+            part['file'].close()
+            upload.path = part['tmp_path']
+        self.uploads.append(upload)
+
+    def commit(self):
+        """Move received files to their names in dest_dir (runs on a worker thread)"""
+        if self.in_memory or self.dest_dir is None:
+            return
+        for upload in self.uploads:
+            if not secure_filename(upload.filename):
+                continue
+            dest = self.dest_dir / secure_filename(upload.filename)
+            existed = dest.exists()
+            os.chmod(upload.path, FILE_MODE)
+            os.replace(upload.path, dest)
+            self._created.remove(upload.path)
+            upload.path = dest
+            if not existed:
+                self._created.append(dest)
+
+    def abort(self):
+        """Remove the files this request created (runs on a worker thread)"""
+        for part in self._open_parts:
+            if part['file'] is not None:
+                part['file'].close()
+        for path in self._created:
+            path.unlink(missing_ok=True)
+
+
+async def receive_uploads(
+    request: Request,
+    field_name: str,
+    dest_dir: Optional[Path] = None,
+    in_memory: bool = False,
+    max_file_size: int = MAX_FILE_SIZE,
+    max_files: int = MAX_FILES_PER_REQUEST
+) -> List[StoredUpload]:
+    """
+    Stream the files of a multipart form field out of the request body
+
+    With dest_dir, files are kept there under their secure_filename once
+    the whole body has been received; an aborted request leaves files that
+    were already there untouched. Otherwise they are written to temporary files that the caller removes
+    with remove_uploads(), or kept in memory when in_memory is set.
+
+    Limits are checked while the body is read, so an oversized file or one
+    file too many is rejected without receiving the rest of the request.
+
+    Raises:
+        HTTPException: MISSING_FILES, FILE_TOO_LARGE or TOO_MANY_FILES
+    """
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    boundary = options.get(b'boundary')
+    if content_type != b'multipart/form-data' or not boundary:
+        raise api_error_response(MessageCode.MISSING_FILES)
+
+    content_length = request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > MAX_CONTENT_LENGTH:
+        raise api_error_response(MessageCode.FILE_TOO_LARGE, max_size=format_size(MAX_CONTENT_LENGTH))
+
+    receiver = _UploadReceiver(field_name, Path(dest_dir) if dest_dir else None, in_memory,
+                               max_file_size, max_files)
+    parser = MultipartParser(boundary, receiver.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_CONTENT_LENGTH:
+                raise api_error_response(MessageCode.FILE_TOO_LARGE, max_size=format_size(MAX_CONTENT_LENGTH))
+            parser.write(chunk)
+            await run_in_threadpool(receiver.flush)
+        parser.finalize()
+        await run_in_threadpool(receiver.flush)
+        await run_in_threadpool(receiver.commit)
+    except BaseException:
+        await run_in_threadpool(receiver.abort)
+        raise
+
+    if not receiver.uploads:
+        raise api_error_response(MessageCode.MISSING_FILES)
+    logger.debug(f"Received {len(receiver.uploads)} upload(s), {received} bytes")
+    return receiver.uploads
+
+
+def remove_uploads(uploads: List[StoredUpload]):
+    """Delete the files behind received uploads"""
+    for upload in uploads:
+        if upload.path is not None:
+            try:
+                upload.path.unlink()
+            except OSError:
+                pass
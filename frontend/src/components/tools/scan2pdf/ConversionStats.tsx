@@ -2,7 +2,7 @@ import { GlassCard, GlassCardContent, GlassCardDescription, GlassCardHeader, Gla
 import { type ResultsState, type FileItem } from './types';
 import { CheckCircle, XCircle, Info, FileText } from '@phosphor-icons/react';
 import { GlassButton } from '../../ui/glass-button';
-import { previewPdf } from '../../../services/scan2pdf';
+import { previewPdf, previewThumbnail } from '../../../services/scan2pdf';
 
 interface ConversionStatsProps {
   results: ResultsState;
@@ -55,6 +55,15 @@ export function ConversionStats({ results, fileList }: ConversionStatsProps) {
                     {file.status === 'success' && <CheckCircle className="h-4 w-4 text-accent-blue" weight="duotone" />}
                     {file.status === 'skipped' && <Info className="h-4 w-4 text-gray-400" weight="duotone" />}
                     {file.status === 'failed' && <XCircle className="h-4 w-4 text-red-400" weight="duotone" />}
+                    {file.status === 'success' && file.output_path && (
+                      <img
+                        src={previewThumbnail(file.output_path)}
+                        alt=""
+                        loading="lazy"
+                        className="h-10 w-8 object-cover rounded border border-glass-border bg-white"
+                        onError={(e) => { e.currentTarget.style.display = 'none'; }}
+                      />
+                    )}
                     <span className="text-sm text-gray-100">{file.name}</span>
                   </div>
                   <div className="flex items-center gap-2">
@@ -117,7 +117,15 @@ export async function convertFiles(
  * Preview PDF - Returns URL for PDF preview
  */
 export function previewPdf(filePath: string): string {
-  const url = `${import.meta.env.VITE_API_URL || ''}/api/tools/image-to-pdf/preview-pdf?file=${encodeURIComponent(filePath)}`;
+  const url = `${import.meta.env.VITE_API_URL || ''}/api/tools/image-to-pdf/preview-pdf?path=${encodeURIComponent(filePath)}`;
+  return url;
+}
+
+/**
+ * Preview thumbnail - Returns URL for a cached JPEG render of one PDF page
+ */
+export function previewThumbnail(filePath: string, page: number = 1): string {
+  const url = `${import.meta.env.VITE_API_URL || ''}/api/tools/image-to-pdf/preview-thumbnail?path=${encodeURIComponent(filePath)}&page=${page}`;
   return url;
 }
 
@@ -0,0 +1,98 @@
+"""
+Scan2PDF OCR cache
+What goes into a cache key and which outputs are cached
+"""
+
+import backend.services.scan2pdf_service as scan2pdf_service
+import backend.utils.image_converter as image_converter
+from backend.utils.ocr_cache import OCRCache
+
+Service = scan2pdf_service.Scan2PDFService
+
+
+def use_cache(tmp_path, monkeypatch):
+    cache = OCRCache(tmp_path / 'cache', 1024 * 1024)
+    monkeypatch.setattr(scan2pdf_service, 'get_ocr_cache', lambda: cache)
+    monkeypatch.setattr(scan2pdf_service, 'tesseract_available', True)
+    return cache
+
+
+def write_file(path, data=b'scan'):
+    path.write_bytes(data)
+    return path
+
+
+def test_key_ignores_processing_options(monkeypatch):
+    monkeypatch.setattr(image_converter, 'get_ocr_engine_id', lambda: 'pytesseract 5.3.0')
+    base = image_converter.get_ocr_params({'ocr_mode': 'smart'})
+    assert image_converter.get_ocr_params({'ocr_mode': 'smart', 'skip_if_exists': False,
+                                           'page_workers': 4, 'cancel_token': object()}) == base
+    assert image_converter.get_ocr_params({'ocr_mode': 'full'}) != base
+
+
+def test_key_changes_with_engine(tmp_path, monkeypatch):
+    source = write_file(tmp_path / 'scan.png')
+    cache = OCRCache(tmp_path / 'cache', 1024)
+    monkeypatch.setattr(image_converter, 'get_ocr_engine_id', lambda: 'pytesseract 5.3.0')
+    key = cache.make_key(source, image_converter.get_ocr_params())
+    monkeypatch.setattr(image_converter, 'get_ocr_engine_id', lambda: 'tesserocr 5.3.0')
+    assert cache.make_key(source, image_converter.get_ocr_params()) != key
+
+
+def test_image_only_images_bypass_the_cache(tmp_path, monkeypatch):
+    cache = use_cache(tmp_path, monkeypatch)
+    options = {'skip_if_exists': False, 'image_only': True}
+
+    key, cached = Service._cache_lookup(write_file(tmp_path / 'scan.png'), tmp_path / 'scan.pdf', options)
+    assert (key, cached) == (None, None)
+    assert cache.stats()['misses'] == 0
+
+    # PDFs are still OCR'd in image-only batches, so they are looked up
+    key, cached = Service._cache_lookup(write_file(tmp_path / 'doc.pdf'), tmp_path / 'doc_ocr.pdf', options)
+    assert key is not None and cached is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_hit_restores_the_output(tmp_path, monkeypatch):
+    cache = use_cache(tmp_path, monkeypatch)
+    source = write_file(tmp_path / 'doc.pdf')
+    options = {'skip_if_exists': False}
+    key, _ = Service._cache_lookup(source, tmp_path / 'out.pdf', options)
+    Service._cache_store(key, write_file(tmp_path / 'out.pdf', b'%PDF searchable'), True,
+                         "Searchable PDF created from 1 page(s)", {'pages_fallback': 0})
+
+    (tmp_path / 'out.pdf').unlink()
+    _, cached = Service._cache_lookup(source, tmp_path / 'out.pdf', options)
+    assert cached[0] is True and cached[2]['cached'] is True
+    assert (tmp_path / 'out.pdf').read_bytes() == b'%PDF searchable'
+
+
+def test_outputs_without_ocr_are_not_cached(tmp_path, monkeypatch):
+    cache = use_cache(tmp_path, monkeypatch)
+    pdf_path = write_file(tmp_path / 'out.pdf', b'%PDF')
+
+    Service._cache_store('a' * 64, pdf_path, True, "Searchable PDF created from 3 page(s) "
+                         "(2 OCR'd, 0 passed through, 1 without OCR (OCR failed))", {'pages_fallback': 1})
+    Service._cache_store('b' * 64, pdf_path, True, "Searchable PDF created from 3 frame(s)",
+                         {'pages_fallback': 1})
+    Service._cache_store('c' * 64, pdf_path, True, "PDF created without OCR (OCR failed)", {})
+    Service._cache_store('d' * 64, pdf_path, False, "Error processing PDF: broken", {})
+    assert cache.stats()['entries'] == 0
+
+    Service._cache_store('e' * 64, pdf_path, True, "Searchable PDF created from 3 page(s)",
+                         {'pages_fallback': 0})
+    assert cache.stats()['entries'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = OCRCache(tmp_path / 'cache', 10)
+    pdf_path = write_file(tmp_path / 'out.pdf', b'%PDF-1')
+    cache.put('a' * 64, pdf_path)
+    cache.put('b' * 64, pdf_path)
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['evictions'] == 1
+    assert not cache.get('a' * 64, tmp_path / 'restored.pdf')
+    assert cache.get('b' * 64, tmp_path / 'restored.pdf')
+
+    # The index is rebuilt from disk on restart
+    assert OCRCache(tmp_path / 'cache', 10).stats()['entries'] == 1
@@ -0,0 +1,134 @@
+"""
+Scan2PDF folder manifest
+Incremental folder runs convert new and changed files only
+"""
+
+import asyncio
+import os
+
+from PIL import Image
+
+import backend.services.scan2pdf_service as scan2pdf_service
+from backend.utils.scan_manifest import ScanManifest, iter_directory
+
+
+def run_convert(input_dir, output_dir, **kwargs):
+    async def collect():
+        service = scan2pdf_service.Scan2PDFService()
+        return [event async for event in service.convert([], str(input_dir), str(output_dir),
+                                                         execution_mode='sequential', incremental=True,
+                                                         image_only=True, optimize=False, **kwargs)]
+    return asyncio.run(collect())[-1]
+
+
+def statuses(complete):
+    return {f['name']: f['status'] for f in complete['files']}
+
+
+def make_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan2pdf_service, 'get_ocr_cache', lambda: None)
+    monkeypatch.setattr(scan2pdf_service, 'get_search_index', lambda: None)
+    db_path = tmp_path / 'manifests' / 'scans.sqlite3'
+    monkeypatch.setattr(ScanManifest, 'for_folders', classmethod(lambda cls, i, o: cls(db_path, i)))
+    input_dir = tmp_path / 'scans'
+    output_dir = tmp_path / 'out'
+    input_dir.mkdir()
+    output_dir.mkdir()
+    for name in ('a', 'b'):
+        Image.new('RGB', (100, 140), 'white').save(input_dir / f'{name}.png')
+    return input_dir, output_dir
+
+
+def partition(manifest, input_dir, recursive=True, **kwargs):
+    entries = list(iter_directory(input_dir, {'.png'}, recursive))
+    changed, unchanged = manifest.partition(entries, recursive=recursive, **kwargs)
+    return sorted(p.name for p in changed), sorted(p.name for p in unchanged)
+
+
+def shift_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_first_incremental_run_skips_existing_outputs(tmp_path, monkeypatch):
+    input_dir, output_dir = make_folder(tmp_path, monkeypatch)
+    (output_dir / 'a.pdf').write_bytes(b'%PDF-1.4 existing output')
+
+    complete = run_convert(input_dir, output_dir)
+    assert statuses(complete) == {'a.pdf': 'skipped', 'b.pdf': 'success'}
+    assert (output_dir / 'a.pdf').read_bytes() == b'%PDF-1.4 existing output'
+
+    # Both outputs are now in the manifest, skipped or not
+    complete = run_convert(input_dir, output_dir)
+    assert complete['total'] == 0
+    assert complete['unchanged'] == 2
+
+
+def test_changed_file_is_reconverted_despite_skip_existing(tmp_path, monkeypatch):
+    input_dir, output_dir = make_folder(tmp_path, monkeypatch)
+    (output_dir / 'a.pdf').write_bytes(b'%PDF-1.4 existing output')
+    run_convert(input_dir, output_dir)
+
+    Image.new('RGB', (120, 160), 'black').save(input_dir / 'a.png')
+    shift_mtime(input_dir / 'a.png')
+
+    complete = run_convert(input_dir, output_dir)
+    assert statuses(complete) == {'a.pdf': 'success'}
+    assert complete['unchanged'] == 1
+    assert (output_dir / 'a.pdf').read_bytes() != b'%PDF-1.4 existing output'
+
+
+def test_new_file_without_output_is_converted(tmp_path, monkeypatch):
+    input_dir, output_dir = make_folder(tmp_path, monkeypatch)
+
+    complete = run_convert(input_dir, output_dir, skip_existing=False)
+    assert statuses(complete) == {'a.pdf': 'success', 'b.pdf': 'success'}
+
+    Image.new('RGB', (100, 140), 'white').save(input_dir / 'c.png')
+    complete = run_convert(input_dir, output_dir)
+    assert statuses(complete) == {'c.pdf': 'success'}
+    assert complete['unchanged'] == 2
+
+
+def test_touched_file_with_same_content_is_unchanged(tmp_path):
+    input_dir = tmp_path / 'scans'
+    input_dir.mkdir()
+    Image.new('RGB', (100, 140), 'white').save(input_dir / 'a.png')
+    manifest = ScanManifest(tmp_path / 'm.sqlite3', input_dir)
+    manifest.record(input_dir / 'a.png', tmp_path / 'a.pdf', 'success')
+
+    shift_mtime(input_dir / 'a.png')
+    assert partition(manifest, input_dir) == ([], ['a.pdf'])
+    # The new mtime was stored, so the next scan does not hash again
+    assert partition(manifest, input_dir) == ([], ['a.pdf'])
+
+
+def test_failed_file_is_retried_only_when_asked_or_changed(tmp_path):
+    input_dir = tmp_path / 'scans'
+    input_dir.mkdir()
+    Image.new('RGB', (100, 140), 'white').save(input_dir / 'a.png')
+    manifest = ScanManifest(tmp_path / 'm.sqlite3', input_dir)
+    manifest.record(input_dir / 'a.png', tmp_path / 'a.pdf', 'failed')
+
+    assert partition(manifest, input_dir) == (['a.png'], [])
+    assert partition(manifest, input_dir, retry_failed=False) == ([], [])
+    shift_mtime(input_dir / 'a.png')
+    assert partition(manifest, input_dir, retry_failed=False) == (['a.png'], [])
+
+
+def test_non_recursive_scan_keeps_subfolder_rows(tmp_path):
+    input_dir = tmp_path / 'scans'
+    (input_dir / 'sub').mkdir(parents=True)
+    Image.new('RGB', (100, 140), 'white').save(input_dir / 'a.png')
+    Image.new('RGB', (100, 140), 'white').save(input_dir / 'sub' / 'b.png')
+    manifest = ScanManifest(tmp_path / 'm.sqlite3', input_dir)
+    manifest.record(input_dir / 'a.png', tmp_path / 'a.pdf', 'success')
+    manifest.record(input_dir / 'sub' / 'b.png', tmp_path / 'sub' / 'b.pdf', 'success')
+
+    assert partition(manifest, input_dir, recursive=False) == ([], ['a.pdf'])
+    assert partition(manifest, input_dir) == ([], ['a.pdf', 'b.pdf'])
+
+    # A recursive scan does drop rows of sources that are gone
+    (input_dir / 'sub' / 'b.png').unlink()
+    partition(manifest, input_dir)
+    assert manifest.recorded([input_dir / 'sub' / 'b.png']) == set()
@@ -0,0 +1,78 @@
+"""
+Scan2PDF responsiveness
+A running conversion must not hold up other requests on the same worker
+"""
+
+import asyncio
+import os
+import time
+from io import BytesIO
+
+import httpx
+import img2pdf
+from PIL import Image
+
+import backend.services.scan2pdf_service as scan2pdf_service
+import backend.utils.image_converter as image_converter
+from backend.app import app
+
+OCR_SECONDS = 1.0
+# Health checks answer in milliseconds; this only fails if the loop is blocked by OCR
+HEALTH_MAX_SECONDS = 0.25
+
+
+class BlockingEngine(image_converter.OCREngine):
+    """OCR engine that holds its thread like a real Tesseract run would"""
+
+    name = 'blocking'
+
+    def image_to_pdf(self, img, text_only=False, cancel_token=None):
+        time.sleep(OCR_SECONDS)
+        if isinstance(img, str):
+            img = Image.open(img)
+        buffer = BytesIO()
+        img.convert('RGB').save(buffer, format='JPEG')
+        return img2pdf.convert(buffer.getvalue())
+
+
+def test_health_stays_fast_during_conversion(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_converter, '_engine_pool', image_converter.OCREnginePool(BlockingEngine, 1))
+    monkeypatch.setattr(image_converter, '_engine_pool_pid', os.getpid())
+    monkeypatch.setattr(image_converter, 'tesseract_available', True)
+    monkeypatch.setattr(scan2pdf_service, 'get_ocr_cache', lambda: None)
+    monkeypatch.setattr(scan2pdf_service, 'get_search_index', lambda: None)
+
+    input_files = []
+    for i in range(2):
+        image_path = tmp_path / f"scan{i}.png"
+        Image.new('RGB', (200, 280), 'white').save(image_path)
+        input_files.append(str(image_path))
+    body = {'input_files': input_files, 'output_path': str(tmp_path / 'out'),
+            'skip_existing': False, 'execution_mode': 'sequential'}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            conversion = asyncio.ensure_future(client.post('/api/tools/image-to-pdf/convert', json=body,
+                                                           timeout=30))
+            await asyncio.sleep(0.2)
+            latencies = []
+            while not conversion.done():
+                started = time.perf_counter()
+                response = await client.get('/api/health')
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+                await asyncio.sleep(0.05)
+            return (await conversion), latencies
+
+    started = time.perf_counter()
+    response, latencies = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert '"type": "complete"' in response.text
+    assert '"successful": 2' in response.text
+    # The conversion really held an OCR thread for both files
+    assert elapsed >= 2 * OCR_SECONDS
+    assert len(latencies) >= 10
+    assert max(latencies) < HEALTH_MAX_SECONDS
@@ -0,0 +1,63 @@
+"""
+Streaming multipart uploads
+Limits are enforced while receiving, and a rejected request cleans up after itself
+"""
+
+import asyncio
+import hashlib
+import os
+import stat
+
+import httpx
+from fastapi import FastAPI, Request
+
+from backend.utils.uploads import FILE_MODE, receive_uploads
+
+
+def make_app(dest_dir, **limits):
+    app = FastAPI()
+
+    @app.post('/upload')
+    async def upload(request: Request):
+        uploads = await receive_uploads(request, 'files', dest_dir=dest_dir, **limits)
+        return [u.to_dict() for u in uploads]
+
+    return app
+
+
+def post(app, files):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.post('/upload', files=[('files', f) for f in files])
+    return asyncio.run(run())
+
+
+def test_files_are_stored_with_their_hash_and_mode(tmp_path):
+    response = post(make_app(tmp_path), [('a.png', b'first'), ('b.png', b'second')])
+
+    assert response.status_code == 200
+    assert [u['name'] for u in response.json()] == ['a.png', 'b.png']
+    assert response.json()[0]['sha256'] == hashlib.sha256(b'first').hexdigest()
+    assert (tmp_path / 'a.png').read_bytes() == b'first'
+    assert stat.S_IMODE((tmp_path / 'b.png').stat().st_mode) == FILE_MODE
+    assert sorted(os.listdir(tmp_path)) == ['a.png', 'b.png']
+
+
+def test_too_many_files_leaves_existing_files_alone(tmp_path):
+    (tmp_path / 'a.png').write_bytes(b'already here')
+
+    response = post(make_app(tmp_path, max_files=2), [('a.png', b'new'), ('b.png', b'x'), ('c.png', b'y')])
+
+    assert response.status_code == 400
+    assert response.json()['detail']['code'] == 'TOO_MANY_FILES'
+    assert (tmp_path / 'a.png').read_bytes() == b'already here'
+    assert os.listdir(tmp_path) == ['a.png']
+
+
+def test_oversized_file_is_rejected_and_removed(tmp_path):
+    response = post(make_app(tmp_path, max_file_size=1024), [('a.png', b'x' * 10), ('b.png', b'x' * 4096)])
+
+    assert response.status_code == 413
+    assert response.json()['detail']['code'] == 'FILE_TOO_LARGE'
+    assert os.listdir(tmp_path) == []